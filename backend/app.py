@@ -1,14 +1,33 @@
-from flask import Flask
-from extensions import db, socketio, cors
-from routes import main
-import events # Import to register events
-import os
 from dotenv import load_dotenv
 
+# Load .env before importing modules that read their settings at import time
 load_dotenv()
 
+import os
+
+# Socket engine, chosen at startup: 'flask' (Flask-SocketIO, events.py) or
+# 'asyncio' (python-socketio AsyncServer, async_engine.py)
+SOCKET_ENGINE = os.getenv('SOCKET_ENGINE', 'flask')
+if SOCKET_ENGINE == 'asyncio':
+    # Flask-SocketIO then only runs the background jobs, as plain threads
+    os.environ['SOCKETIO_ASYNC_MODE'] = 'threading'
+
+from flask import Flask
+from extensions import db, socketio, socketio_options, cors
+from routes import main
+import events # Import to register events
+import metrics
+import connections
+import logging
+
 def create_app():
     app = Flask(__name__)
+
+    # Leveled logging; hot-path debug lines are also sampled (LOG_SAMPLE_RATE)
+    logging.basicConfig(
+        level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+        format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+    )
     
     # Database Configuration (MySQL)
     db_user = os.getenv("DB_USER")
@@ -17,14 +36,18 @@ def create_app():
     db_name = os.getenv("DB_NAME")
     db_port = os.getenv("DB_PORT", 3306)
     
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"mysql+mysqlconnector://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+    # DATABASE_URL overrides the MySQL settings (e.g. sqlite:///bench.db for local benchmarks)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL') or f"mysql+mysqlconnector://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Explicit pool sizing, recycling and pre-ping (see connections.py)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = connections.engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'fallback_secret_for_dev_only')
     
     # Initialize Extensions
     db.init_app(app)
     cors.init_app(app)
-    socketio.init_app(app)
+    socketio.init_app(app, **socketio_options)
+    metrics.init_app(app)
     
     from flask_jwt_extended import JWTManager
     jwt = JWTManager(app)
@@ -32,6 +55,9 @@ def create_app():
     from auth import auth_bp
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(main, url_prefix='/api')
+
+    # Open the first connections now instead of during the first game events
+    connections.warm_pools(app)
     
     # Note: tables are created via db_init.py, so we don't need db.create_all() here necessarily,
     # but it doesn't hurt to keep it if models match.
@@ -40,6 +66,20 @@ def create_app():
         
     return app
 
+def start_background_workers(app):
+    # Long-running jobs of the game server (not started by scripts like update_db.py)
+    from writers import start_writers
+    from pinpool import start_pin_pool
+    from keyspace import start_sweeper
+    start_writers(app)
+    start_pin_pool(app)
+    start_sweeper()
+
 if __name__ == '__main__':
     app = create_app()
-    socketio.run(app, debug=True, port=5000)
+    start_background_workers(app)
+    if SOCKET_ENGINE == 'asyncio':
+        from async_engine import run
+        run(app, port=5000)
+    else:
+        socketio.run(app, debug=True, port=5000)
@@ -0,0 +1,156 @@
+"""
+Asyncio engine: the game's Socket.IO events on python-socketio's AsyncServer.
+
+    pip install -r requirements-async.txt
+    SOCKET_ENGINE=asyncio python app.py
+
+Same event contract and Redis layout as events.py: both register the flows of
+handlers.py, this one with an AsyncIO (gameio.py). Every Redis round trip is awaited
+on redis.asyncio and the hot-path SQL reads (PIN fallback, question set) go through an
+async SQLAlchemy engine (aiomysql / aiosqlite), so one process holds many idle sockets
+and overlaps the Redis work of concurrent players. Event latency, Redis commands and
+fan-out are recorded in metrics.py as with Flask-SocketIO.
+
+The Flask app (REST API) is mounted behind the same ASGI app and runs in a thread
+pool, like the jobs that batch SQL writes (write-behind writers, PIN pool, key
+sweeper, game finalization): Flask-SocketIO runs them as plain threads in this mode.
+"""
+import os
+import asyncio
+import socketio as python_socketio
+from asgiref.wsgi import WsgiToAsgi
+from redis.asyncio import Redis, BlockingConnectionPool
+from redis.asyncio.connection import Connection, SSLConnection
+from sqlalchemy.ext.asyncio import create_async_engine
+import metrics
+import handlers
+from extensions import REDIS_MAX_CONNECTIONS, REDIS_POOL_TIMEOUT, REDIS_HEALTH_CHECK_INTERVAL, REDIS_SOCKET_TIMEOUT
+from connections import engine_options
+from gameio import GameIO
+from finalize import finalize_game
+from metrics import timed_event
+from ratelimit import rate_limited
+
+# Async drivers for the configured DATABASE_URL (ASYNC_DATABASE_URL overrides it)
+ASYNC_DRIVERS = {
+    'mysql': 'mysql+aiomysql',
+    'mysql+mysqlconnector': 'mysql+aiomysql',
+    'mysql+pymysql': 'mysql+aiomysql',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+class InstrumentedAsyncConnection(metrics.InstrumentedConnectionMixin, Connection):
+    pass
+
+
+class InstrumentedAsyncSSLConnection(metrics.InstrumentedConnectionMixin, SSLConnection):
+    pass
+
+
+sio = python_socketio.AsyncServer(
+    async_mode='asgi',
+    cors_allowed_origins='*',
+    client_manager=python_socketio.AsyncRedisManager(os.getenv('SOCKETIO_MESSAGE_QUEUE')) if os.getenv('SOCKETIO_MESSAGE_QUEUE') else None,
+    **({'serializer': os.getenv('SOCKETIO_SERIALIZER')} if os.getenv('SOCKETIO_SERIALIZER') else {})
+)
+
+# Same pool settings (and command counting) as the sync client (extensions.py)
+redis_password = os.getenv('REDIS_PASSWORD', None)
+rds = Redis(connection_pool=BlockingConnectionPool(
+    connection_class=InstrumentedAsyncSSLConnection if redis_password else InstrumentedAsyncConnection,
+    host=os.getenv('REDIS_HOST', 'localhost'),
+    port=int(os.getenv('REDIS_PORT', 6379)),
+    password=redis_password,
+    db=0,
+    decode_responses=True,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    timeout=REDIS_POOL_TIMEOUT,
+    health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+    socket_timeout=REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+    socket_keepalive=True
+))
+
+
+def async_database_uri(uri):
+    scheme, rest = uri.split('://', 1)
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+class AsyncIO(GameIO):
+    def __init__(self, sio, redis):
+        super().__init__(redis)
+        self.sio = sio
+        # Set by create_asgi_app
+        self.app = None
+        self.engine = None
+
+    async def run(self, result):
+        return await result
+
+    async def emit(self, event, data=None, to=None):
+        # Fan-out counted like InstrumentedSocketIO (a sid is a room of one)
+        metrics.count_emit(to, len(self.sio.manager.rooms.get('/', {}).get(to, {})))
+        await self.sio.emit(event, data, to=to)
+
+    async def enter_room(self, sid, room):
+        await self.sio.enter_room(sid, room)
+
+    async def disconnect(self, sid):
+        await self.sio.disconnect(sid)
+
+    async def sleep(self, seconds):
+        await self.sio.sleep(seconds)
+
+    def start_task(self, flow, *args):
+        async def task():
+            # The task copied the scope of the event that started it
+            metrics.background_scope()
+            await flow(*args)
+        self.sio.start_background_task(task)
+
+    async def fetch(self, statement):
+        async with self.engine.connect() as conn:
+            return (await conn.execute(statement)).all()
+
+    async def finalize(self, pin):
+        # Bulk SQL writes stay on the sync engine, in a worker thread
+        await asyncio.to_thread(finalize_game, self.app, pin)
+
+
+io = AsyncIO(sio, rds)
+
+
+# Socket events (same flows, timing and rate limits as events.py)
+
+def register(event, flow, per_player=False):
+    async def handler(sid, data=None):
+        await flow(io, sid, data)
+    sio.on(event, timed_event(event)(rate_limited(event, per_player)(handler)))
+
+
+register('join_game', handlers.join_game)
+register('resume_game', handlers.resume_game)
+register('start_game', handlers.start_game)
+register('next_question', handlers.next_question)
+register('leaderboard_sync', handlers.leaderboard_sync)
+register('submit_answer', handlers.submit_answer, per_player=True)
+
+
+@sio.on('disconnect')
+async def disconnect(sid, *args):
+    await handlers.disconnect(io, sid)
+
+
+def create_asgi_app(app):
+    """Socket.IO on /socket.io, everything else to the Flask app."""
+    io.app = app
+    uri = os.getenv('ASYNC_DATABASE_URL') or async_database_uri(app.config['SQLALCHEMY_DATABASE_URI'])
+    io.engine = create_async_engine(uri, **engine_options(uri))
+    return python_socketio.ASGIApp(sio, other_asgi_app=WsgiToAsgi(app))
+
+
+def run(app, host='0.0.0.0', port=5000):
+    import uvicorn
+    uvicorn.run(create_asgi_app(app), host=host, port=port, log_level=os.getenv('LOG_LEVEL', 'INFO').lower())
@@ -0,0 +1,411 @@
+"""
+Load generator and latency benchmark for the Socket.IO game flow.
+
+Drives create_game -> join_game -> start_game -> submit_answer bursts -> next_question
+-> game over with many simulated python-socketio clients and saves the results as JSON.
+
+    pip install -r requirements-bench.txt
+    # against a running server
+    python benchmark.py --players 1000 --questions 5 --output results/1000.json
+    # or let the benchmark start one (SQLite database + the local Redis from REDIS_HOST/REDIS_PORT)
+    python benchmark.py --start-server --workers 2 --players 1000
+
+Compare two runs with: python benchmark.py --compare before.json after.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import asyncio
+import platform
+import tempfile
+import threading
+import subprocess
+import aiohttp
+import socketio
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CREATE_TABLES = """
+from app import create_app
+from extensions import db
+import models
+app = create_app()
+with app.app_context():
+    db.create_all()
+"""
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[int(round((len(values) - 1) * q))]
+
+
+def summarize(values):
+    # Latencies are collected in seconds and reported in milliseconds
+    return {
+        'count': len(values),
+        'p50_ms': round(percentile(values, 0.50) * 1000, 2) if values else None,
+        'p95_ms': round(percentile(values, 0.95) * 1000, 2) if values else None,
+        'p99_ms': round(percentile(values, 0.99) * 1000, 2) if values else None,
+        'max_ms': round(max(values) * 1000, 2) if values else None
+    }
+
+
+class ServerMonitor:
+    """Samples CPU and RSS of the server process (and its workers) in a thread."""
+
+    def __init__(self, pid, interval=0.5):
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._proc = psutil.Process(pid) if psutil and pid else None
+
+    def _processes(self):
+        try:
+            return [self._proc] + self._proc.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return []
+
+    def _run(self):
+        for p in self._processes():
+            p.cpu_percent(None) # first call only primes the counter
+        while not self._stop.wait(self.interval):
+            cpu, rss = 0.0, 0
+            for p in self._processes():
+                try:
+                    cpu += p.cpu_percent(None)
+                    rss += p.memory_info().rss
+                except psutil.NoSuchProcess:
+                    pass
+            self.samples.append((cpu, rss))
+
+    def start(self):
+        if self._proc:
+            threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if not self.samples:
+            return {'available': False, 'reason': 'psutil not installed or server pid unknown'}
+        cpus = [c for c, _ in self.samples]
+        rss = [r for _, r in self.samples]
+        return {
+            'available': True,
+            'cpu_percent_avg': round(sum(cpus) / len(cpus), 1),
+            'cpu_percent_max': round(max(cpus), 1),
+            'rss_mb_avg': round(sum(rss) / len(rss) / 2 ** 20, 1),
+            'rss_mb_max': round(max(rss) / 2 ** 20, 1)
+        }
+
+
+class Bench:
+    def __init__(self, args):
+        self.args = args
+        self.pin = None
+        self.question = -1
+        self.messages = {} # question index -> messages received by all clients
+        self.join_latencies = []
+        self.answer_latencies = []
+        self.leaderboard_latencies = []
+        self.errors = {}
+
+    def count_message(self):
+        self.messages[self.question] = self.messages.get(self.question, 0) + 1
+
+    def count_error(self, message):
+        self.errors[message] = self.errors.get(message, 0) + 1
+
+
+class SimPlayer:
+    def __init__(self, bench, index):
+        self.bench = bench
+        self.nickname = f"bench_{index}"
+        self.player_id = None
+        self.submitted_at = None
+        self.waiting_leaderboard = False
+        self.joined = asyncio.Event()
+        self.join_sent_at = None
+        self.prefetched = None
+        self.sio = client(bench.args)
+
+        self.sio.on('joined_success', self.on_joined)
+        self.sio.on('new_question', self.on_new_question)
+        self.sio.on('prefetch_question', self.on_prefetch_question)
+        self.sio.on('reveal_question', self.on_reveal_question)
+        self.sio.on('answer_result', self.on_answer_result)
+        self.sio.on('update_leaderboard', self.on_leaderboard)
+        self.sio.on('leaderboard_delta', self.on_leaderboard)
+        self.sio.on('error', self.on_error)
+        self.sio.on('*', self.on_other)
+
+    async def on_other(self, event, *args):
+        self.bench.count_message()
+
+    async def on_error(self, data):
+        self.bench.count_message()
+        self.bench.count_error(data.get('message') if isinstance(data, dict) else str(data))
+
+    async def on_joined(self, data):
+        self.bench.count_message()
+        self.player_id = data['player_id']
+        self.bench.join_latencies.append(time.perf_counter() - self.join_sent_at)
+        self.joined.set()
+
+    async def on_new_question(self, question):
+        self.bench.count_message()
+        asyncio.ensure_future(self.answer(question))
+
+    async def on_prefetch_question(self, question):
+        self.bench.count_message()
+        self.prefetched = question
+
+    async def on_reveal_question(self, data):
+        self.bench.count_message()
+        if self.prefetched and self.prefetched['index'] == data['index']:
+            await asyncio.sleep(data['start_in'])
+            asyncio.ensure_future(self.answer(self.prefetched))
+
+    async def answer(self, question):
+        # Spread answers over the answer window like a real audience
+        await asyncio.sleep(random.uniform(0, self.bench.args.answer_window))
+        self.submitted_at = time.perf_counter()
+        self.waiting_leaderboard = True
+        await self.sio.emit('submit_answer', {
+            'player_id': self.player_id,
+            'answer_index': random.randrange(len(question.get('options') or [0, 1, 2, 3])),
+            'pin': self.bench.pin,
+            'question_index': question['index']
+        })
+
+    async def on_answer_result(self, data):
+        self.bench.count_message()
+        if self.submitted_at is not None:
+            self.bench.answer_latencies.append(time.perf_counter() - self.submitted_at)
+
+    async def on_leaderboard(self, data):
+        self.bench.count_message()
+        # First leaderboard snapshot after our own answer
+        if self.waiting_leaderboard:
+            self.waiting_leaderboard = False
+            self.bench.leaderboard_latencies.append(time.perf_counter() - self.submitted_at)
+
+    async def connect_and_join(self, url):
+        await self.sio.connect(url, transports=['websocket'])
+        self.join_sent_at = time.perf_counter()
+        await self.sio.emit('join_game', {'pin': self.bench.pin, 'nickname': self.nickname})
+        await asyncio.wait_for(self.joined.wait(), timeout=60)
+
+
+def client(args):
+    # --msgpack: binary packets, the server must run with SOCKETIO_SERIALIZER=msgpack
+    return socketio.AsyncClient(reconnection=False, **({'serializer': 'msgpack'} if args.msgpack else {}))
+
+
+async def setup_game(http, args):
+    api = f"{args.url}/api"
+    async with http.post(f"{api}/create_game", json={
+        'title': f"Benchmark {args.players} players",
+        'prefetch': args.prefetch,
+        'compact': args.compact
+    }) as res:
+        game = await res.json()
+    for i in range(args.questions):
+        async with http.post(f"{api}/add_question", json={
+            'game_id': game['game_id'],
+            'text': f"Benchmark question {i + 1}",
+            'options': ['A', 'B', 'C', 'D'],
+            'correct_index': random.randrange(4)
+        }) as res:
+            await res.read()
+    async with http.put(f"{api}/game/{game['game_id']}/status", json={'status': 'ACTIVE'}) as res:
+        await res.read()
+    return game
+
+
+async def run(args, server_pid=None):
+    bench = Bench(args)
+    monitor = ServerMonitor(server_pid)
+    monitor.start()
+
+    async with aiohttp.ClientSession() as http:
+        game = await setup_game(http, args)
+    bench.pin = game['pin']
+
+    game_over = asyncio.Event()
+    host = client(args)
+
+    @host.on('game_over')
+    async def on_game_over(*_):
+        bench.count_message()
+        game_over.set()
+
+    @host.on('*')
+    async def on_host_message(event, *_):
+        bench.count_message()
+
+    await host.connect(args.url, transports=['websocket'])
+    await host.emit('join_game', {'pin': bench.pin, 'nickname': 'ADMIN'})
+
+    # Join storm
+    players = [SimPlayer(bench, i) for i in range(args.players)]
+    limit = asyncio.Semaphore(args.connect_concurrency)
+
+    async def join(player):
+        async with limit:
+            try:
+                await player.connect_and_join(args.url)
+            except Exception as e:
+                bench.count_error(f"join failed: {type(e).__name__}")
+
+    join_started = time.perf_counter()
+    await asyncio.gather(*[join(p) for p in players])
+    join_elapsed = time.perf_counter() - join_started
+    joined = sum(1 for p in players if p.joined.is_set())
+
+    # Questions: answer burst, then advance
+    question_times = []
+    for i in range(args.questions):
+        bench.question = i
+        started = time.perf_counter()
+        await host.emit('start_game' if i == 0 else 'next_question', {'pin': bench.pin})
+        await asyncio.sleep(args.answer_window + args.grace)
+        question_times.append(time.perf_counter() - started)
+
+    bench.question = args.questions
+    await host.emit('next_question', {'pin': bench.pin})
+    try:
+        await asyncio.wait_for(game_over.wait(), timeout=30)
+    except asyncio.TimeoutError:
+        bench.count_error('game_over not received')
+
+    await asyncio.gather(*[p.sio.disconnect() for p in players], return_exceptions=True)
+    await host.disconnect()
+
+    return {
+        'config': {
+            'players': args.players,
+            'questions': args.questions,
+            'answer_window_s': args.answer_window,
+            'prefetch': args.prefetch,
+            'compact': args.compact,
+            'msgpack': args.msgpack,
+            'workers': args.workers if args.start_server else None,
+            'url': args.url
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'join': {
+            'joined': joined,
+            'elapsed_s': round(join_elapsed, 3),
+            'throughput_per_s': round(joined / join_elapsed, 1) if join_elapsed else None,
+            'latency': summarize(bench.join_latencies)
+        },
+        'submit_to_answer_result': summarize(bench.answer_latencies),
+        'submit_to_update_leaderboard': summarize(bench.leaderboard_latencies),
+        'messages_per_question': {str(k): v for k, v in sorted(bench.messages.items())},
+        'server': monitor.stop(),
+        'errors': bench.errors
+    }
+
+
+def start_server(args):
+    db_path = os.path.join(tempfile.mkdtemp(prefix='kahoot_bench_'), 'bench.db')
+    env = dict(os.environ,
+               DATABASE_URL=f"sqlite:///{db_path}",
+               WORKERS=str(args.workers),
+               PORT=str(args.port))
+    if args.msgpack:
+        env['SOCKETIO_SERIALIZER'] = 'msgpack'
+    if args.workers > 1:
+        env.setdefault('SOCKETIO_MESSAGE_QUEUE', f"redis://{os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', 6379)}/0")
+
+    subprocess.run([sys.executable, '-c', CREATE_TABLES], env=env, cwd=BACKEND_DIR, check=True)
+    proc = subprocess.Popen([sys.executable, 'server.py'], env=env, cwd=BACKEND_DIR)
+
+    # Wait for the server to answer HTTP
+    import urllib.request
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"{args.url}/api/games", timeout=1)
+            return proc
+        except Exception:
+            time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError("Server did not start within 30s")
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    rows = [
+        ('join throughput/s', before['join']['throughput_per_s'], after['join']['throughput_per_s']),
+    ]
+    for section in ('submit_to_answer_result', 'submit_to_update_leaderboard'):
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            rows.append((f"{section} {key}", before[section][key], after[section][key]))
+    rows.append(('messages (total)', sum(before['messages_per_question'].values()), sum(after['messages_per_question'].values())))
+
+    for name, b, a in rows:
+        print(f"{name:45} {str(b):>12} -> {str(a):>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--players', type=int, default=100)
+    parser.add_argument('--questions', type=int, default=5)
+    parser.add_argument('--answer-window', type=float, default=2.0, help='seconds over which players answer')
+    parser.add_argument('--grace', type=float, default=2.0, help='extra seconds before advancing')
+    parser.add_argument('--prefetch', action='store_true', help='create the game in prefetch/reveal mode')
+    parser.add_argument('--compact', action='store_true', help='create the game with delta leaderboard updates')
+    parser.add_argument('--msgpack', action='store_true', help='use the msgpack socket serializer')
+    parser.add_argument('--connect-concurrency', type=int, default=200)
+    parser.add_argument('--start-server', action='store_true', help='start server.py with a SQLite database')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--server-pid', type=int, help='pid of an already running server to sample CPU/memory')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    proc = None
+    if args.start_server:
+        args.url = f"http://localhost:{args.port}"
+        proc = start_server(args)
+    try:
+        results = asyncio.run(run(args, server_pid=proc.pid if proc else args.server_pid))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
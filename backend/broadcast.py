@@ -0,0 +1,88 @@
+import os
+from leaderboard import get_top, get_top_delta
+from roster import host_room
+
+# Coalesced leaderboard broadcasting
+# submit_answer only marks the leaderboard dirty. One background task per question
+# emits at most one snapshot per interval to the room, plus a final one on close.
+# The same task sends the live per-option answer counts (game:{pin}:counts:{index},
+# HASH option -> count) to the host screens as 'answer_counts'.
+# Per game settings live in the game:{pin} hash (set by create_game):
+#   leaderboard_interval: seconds between snapshots, within LEADERBOARD_INTERVAL_MIN/MAX
+#   leaderboard_mode: 'interval' (default) or 'on_close' (only emit when the question closes)
+#   compact: 1 to send 'leaderboard_delta' (changed entries only, see leaderboard.py)
+#            instead of the full 'update_leaderboard' list
+LEADERBOARD_INTERVAL_MIN = 0.25 # below this the loop would just spin on Redis
+LEADERBOARD_INTERVAL_MAX = 60
+LEADERBOARD_INTERVAL = float(os.getenv('LEADERBOARD_INTERVAL', 1.0))
+LEADERBOARD_MODES = ('interval', 'on_close')
+COMPACT_DEFAULT = os.getenv('COMPACT_LEADERBOARD', '0') == '1'
+
+
+def dirty_key(pin):
+    return f"game:{pin}:leaderboard_dirty"
+
+
+def counts_key(pin, index):
+    return f"game:{pin}:counts:{index}"
+
+
+def counts_dirty_key(pin):
+    return f"game:{pin}:counts_dirty"
+
+
+async def get_settings(io, pin):
+    interval, mode, compact = await io.run(io.redis.hmget(f"game:{pin}", "leaderboard_interval", "leaderboard_mode", "compact"))
+    interval = float(interval) if interval else LEADERBOARD_INTERVAL
+    interval = min(max(interval, LEADERBOARD_INTERVAL_MIN), LEADERBOARD_INTERVAL_MAX)
+    mode = mode if mode in LEADERBOARD_MODES else 'interval'
+    compact = compact == '1' if compact is not None else COMPACT_DEFAULT
+    return interval, mode, compact
+
+
+async def emit_leaderboard(io, pin, compact):
+    if not compact:
+        await io.emit('update_leaderboard', await get_top(io, pin), to=pin)
+        return
+    delta = await get_top_delta(io, pin)
+    if delta:
+        await io.emit('leaderboard_delta', delta, to=pin)
+
+
+async def flush_leaderboard(io, pin):
+    """Final snapshot for a closing question (in compact mode, only if something changed)."""
+    await io.run(io.redis.delete(dirty_key(pin)))
+    await emit_leaderboard(io, pin, (await get_settings(io, pin))[2])
+
+
+async def start_broadcaster(io, pin, question_index):
+    interval, mode, compact = await get_settings(io, pin)
+    io.start_task(_broadcast_loop, io, pin, question_index, interval, mode, compact)
+
+
+async def _broadcast_loop(io, pin, question_index, interval, mode, compact):
+    while True:
+        await io.sleep(interval)
+
+        # One round trip: is this question still open, and did anything change?
+        pipe = io.redis.pipeline()
+        pipe.hmget(f"game:{pin}", "current_question_index", "question_open")
+        pipe.delete(counts_dirty_key(pin))
+        pipe.hgetall(counts_key(pin, question_index))
+        if mode == 'interval':
+            pipe.delete(dirty_key(pin))
+        results = await io.run(pipe.execute())
+        (current_index, is_open), counts_changed, counts = results[:3]
+        leaderboard_changed = results[3] if mode == 'interval' else False
+
+        if current_index is None or int(current_index) != question_index or is_open == '0':
+            # Question closed (or game gone), the closer emits the final snapshot
+            return
+
+        if counts_changed:
+            await io.emit('answer_counts', {
+                'index': question_index,
+                'counts': {option: int(n) for option, n in counts.items()}
+            }, to=host_room(pin))
+        if leaderboard_changed:
+            await emit_leaderboard(io, pin, compact)
@@ -0,0 +1,84 @@
+import json
+from sqlalchemy import select
+from extensions import redis_client
+from models import Question
+from pins import lookup_pin
+from keyspace import GAME_TTL
+from gameio import run_sync, sync_io
+
+# Question set cache
+# The ordered question list of a game is serialized into a Redis LIST once
+# (at start / PREPARED->ACTIVE) so question delivery and late-join sync can
+# pull a single row with LINDEX instead of re-querying MySQL.
+QUESTIONS_TTL = GAME_TTL # same as game:{pin}, see keyspace.py
+
+
+def questions_key(pin):
+    return f"game:{pin}:questions"
+
+
+def _serialize_question(question):
+    return json.dumps({
+        'text': question.text,
+        'options': question.options,
+        'correct_index': question.correct_option_index
+    })
+
+
+def warm_questions(pin, game_id):
+    """Load the full question set of a game from MySQL into Redis. Returns the question count."""
+    return run_sync(load_questions(sync_io, pin, game_id))
+
+
+async def load_questions(io, pin, game_id):
+    """warm_questions as a game flow (see gameio.py)."""
+    questions = await io.fetch(
+        select(Question.text, Question.options, Question.correct_option_index)
+        .where(Question.game_id == game_id)
+        .order_by(Question.position, Question.id)
+    )
+
+    pipe = io.redis.pipeline()
+    pipe.delete(questions_key(pin))
+    if questions:
+        pipe.rpush(questions_key(pin), *[_serialize_question(q) for q in questions])
+        pipe.expire(questions_key(pin), QUESTIONS_TTL)
+    await io.run(pipe.execute())
+    return len(questions)
+
+
+async def get_question(io, pin, index, cache_only=False):
+    """
+    Returns (question_dict, total_questions) for the given index.
+    question_dict is None if the index is out of range.
+    On a cache miss (e.g. Redis restarted mid-game) the set is re-warmed from MySQL once,
+    unless cache_only is set (background tasks without an app context).
+    """
+    pipe = io.redis.pipeline()
+    pipe.lindex(questions_key(pin), index)
+    pipe.llen(questions_key(pin))
+    raw, total = await io.run(pipe.execute())
+
+    if total == 0 and not cache_only:
+        game = await lookup_pin(io, pin)
+        if not game:
+            return None, 0
+        total = await load_questions(io, pin, game['game_id'])
+        raw = await io.run(io.redis.lindex(questions_key(pin), index)) if total else None
+
+    if raw is None or index < 0:
+        return None, total
+    return json.loads(raw), total
+
+
+def invalidate_questions(pin):
+    redis_client.delete(questions_key(pin))
+
+
+def public_question(question, index):
+    """Client payload for a question (never includes the correct answer)."""
+    return {
+        'text': question['text'],
+        'options': question['options'],
+        'index': index
+    }
@@ -0,0 +1,123 @@
+import os
+import time
+import logging
+from sqlalchemy import text
+from extensions import db, redis_client, redis_pool, REDIS_MAX_CONNECTIONS
+
+logger = logging.getLogger(__name__)
+
+# Connection pools
+# SQLAlchemy and Redis pools are sized from the environment and warmed at startup,
+# so the first events of a game don't pay the TCP/TLS handshakes that steady-state
+# events don't. pre_ping/recycle (MySQL) and health checks (Redis) replace
+# connections the managed services dropped while idle.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10)) # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 280)) # below the usual server/proxy idle timeouts
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', '1') == '1'
+# Connections opened per pool at startup (0 disables)
+POOL_WARMUP = int(os.getenv('POOL_WARMUP', 4))
+
+
+def engine_options(database_uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured pool."""
+    options = {'pool_pre_ping': DB_POOL_PRE_PING, 'pool_recycle': DB_POOL_RECYCLE}
+    if not database_uri.startswith('sqlite'):
+        # SQLite (benchmarks) keeps SQLAlchemy's default pool
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    return options
+
+
+def warm_pools(app, count=None):
+    """Open `count` MySQL and Redis connections and return them to their pools."""
+    count = POOL_WARMUP if count is None else count
+    if count <= 0:
+        return
+    start = time.perf_counter()
+
+    with app.app_context():
+        # Checked out together, so the pool ends up holding `count` distinct connections
+        db_connections = []
+        try:
+            for _ in range(min(count, DB_POOL_SIZE)):
+                conn = db.engine.connect()
+                db_connections.append(conn)
+                conn.execute(text("SELECT 1"))
+        except Exception as e:
+            logger.warning("MySQL pool warm-up failed: %s", e)
+        finally:
+            for conn in db_connections:
+                conn.close()
+
+    if redis_client:
+        redis_connections = []
+        try:
+            for _ in range(min(count, REDIS_MAX_CONNECTIONS)):
+                redis_connections.append(redis_pool.get_connection('PING'))
+            for conn in redis_connections:
+                conn.send_command('PING')
+                conn.read_response()
+        except Exception as e:
+            logger.warning("Redis pool warm-up failed: %s", e)
+        finally:
+            for conn in redis_connections:
+                redis_pool.release(conn)
+
+    logger.info("Connection pools warmed (%s connections each) in %.0f ms", count, (time.perf_counter() - start) * 1000)
+
+
+def _redis_pool_status():
+    # BlockingConnectionPool keeps idle connections (and None placeholders) in a queue
+    created = len(redis_pool._connections)
+    idle = sum(1 for conn in list(redis_pool.pool.queue) if conn is not None)
+    return {
+        'max': REDIS_MAX_CONNECTIONS,
+        'open': created,
+        'in_use': created - idle,
+        'saturation': round((created - idle) / REDIS_MAX_CONNECTIONS, 3)
+    }
+
+
+def _db_pool_status():
+    pool = db.engine.pool
+    if not hasattr(pool, 'checkedout'):
+        return {'class': type(pool).__name__}
+    capacity = pool.size() + max(DB_MAX_OVERFLOW, 0)
+    return {
+        'max': capacity,
+        'open': pool.checkedin() + pool.checkedout(),
+        'in_use': pool.checkedout(),
+        'saturation': round(pool.checkedout() / capacity, 3) if capacity else None
+    }
+
+
+def health():
+    """(report, healthy) for /api/health: a round trip to each backend plus pool usage."""
+    report = {}
+    healthy = True
+
+    start = time.perf_counter()
+    try:
+        db.session.execute(text("SELECT 1"))
+        report['mysql'] = {'ok': True, 'latency_ms': round((time.perf_counter() - start) * 1000, 2)}
+    except Exception as e:
+        db.session.rollback()
+        report['mysql'] = {'ok': False, 'error': str(e)}
+        healthy = False
+    report['mysql']['pool'] = _db_pool_status()
+
+    if redis_client:
+        start = time.perf_counter()
+        try:
+            redis_client.ping()
+            report['redis'] = {'ok': True, 'latency_ms': round((time.perf_counter() - start) * 1000, 2)}
+        except Exception as e:
+            report['redis'] = {'ok': False, 'error': str(e)}
+            healthy = False
+        report['redis']['pool'] = _redis_pool_status()
+    else:
+        report['redis'] = {'ok': False, 'error': 'not configured'}
+        healthy = False
+
+    return report, healthy
@@ -22,10 +22,14 @@ def create_tables():
             cursor.execute("""
             CREATE TABLE IF NOT EXISTS Kahoo_games (
                 id INT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
-                pin VARCHAR(10) NOT NULL UNIQUE,
+                pin VARCHAR(10) NOT NULL,
                 title VARCHAR(100) NULL,
+                status VARCHAR(20) NOT NULL DEFAULT 'PREPARED',
                 created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                finished_at DATETIME NULL
+                finished_at DATETIME NULL,
+                INDEX idx_games_pin (pin),
+                INDEX idx_games_created (created_at, id),
+                INDEX idx_games_status_created (status, created_at, id)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
             """)
             print("Table 'Kahoo_games' checked/created.")
@@ -77,10 +81,11 @@ def create_tables():
                 options JSON NOT NULL,
                 correct_option_index INT NOT NULL,
                 game_id INT UNSIGNED NOT NULL,
+                position INT NOT NULL DEFAULT 0,
                 CONSTRAINT fk_questions_game
                     FOREIGN KEY (game_id) REFERENCES Kahoo_games(id)
                     ON DELETE CASCADE,
-                INDEX idx_questions_game (game_id)
+                INDEX idx_questions_game_position (game_id, position)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
             """)
             print("Table 'Kahoo_questions' checked/created.")
@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+import os
+from sqlalchemy import select
+from extensions import db, socketio
+from models import Player, Answer, Question
+
+# Results export
+# Rows are read in keyset pages of EXPORT_CHUNK_SIZE (WHERE game_id = :g AND id > :last
+# ORDER BY id LIMIT :n) and written out page by page, so memory stays flat whatever
+# the size of the game with any driver (mysqlconnector has no server-side cursors and
+# would buffer a streamed result whole), and the worker yields to socket handlers
+# between pages. Players come from idx_players_game, answers from idx_answers_game
+# (the primary key is the index order within a game). Questions are few per game and
+# are looked up by their play index (position order, as the game served them).
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 1000))
+EXPORT_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+EXPORT_TABLES = ('players', 'answers')
+
+PLAYER_COLUMNS = ['player_id', 'name', 'final_score', 'joined_at']
+ANSWER_COLUMNS = ['player_id', 'player_name', 'question_index', 'question_text', 'option_index',
+                  'option_text', 'correct_option_index', 'is_correct', 'answered_at']
+
+
+def _player_chunks(game_id):
+    stmt = (
+        select(Player.id, Player.name, Player.final_score, Player.created_at)
+        .where(Player.game_id == game_id)
+    )
+    for rows in _pages(stmt, Player.id):
+        yield [[pid, name, score, _isoformat(created_at)] for pid, name, score, created_at in rows]
+
+
+def _answer_chunks(game_id):
+    questions = [
+        (text, options, correct)
+        for text, options, correct in db.session.execute(
+            select(Question.text, Question.options, Question.correct_option_index)
+            .where(Question.game_id == game_id)
+            .order_by(Question.position, Question.id)
+        )
+    ]
+
+    stmt = (
+        select(Answer.id, Answer.player_id, Player.name, Answer.question_index, Answer.option_index,
+               Answer.is_correct, Answer.answered_at)
+        .join(Player, Player.id == Answer.player_id)
+        .where(Answer.game_id == game_id)
+    )
+    for rows in _pages(stmt, Answer.id):
+        chunk = []
+        for _, player_id, name, q_index, option_index, is_correct, answered_at in rows:
+            text, options, correct = questions[q_index] if 0 <= q_index < len(questions) else (None, None, None)
+            option_text = options[option_index] if options and 0 <= option_index < len(options) else None
+            chunk.append([player_id, name, q_index, text, option_index, option_text, correct,
+                          bool(is_correct), _isoformat(answered_at)])
+        yield chunk
+
+
+def _pages(stmt, id_column):
+    """Pages of EXPORT_CHUNK_SIZE rows in id order; id_column must be the first column of stmt."""
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            stmt.where(id_column > last_id).order_by(id_column).limit(EXPORT_CHUNK_SIZE)
+        ).all()
+        if rows:
+            yield rows
+        if len(rows) < EXPORT_CHUNK_SIZE:
+            return
+        last_id = rows[-1][0]
+        # Let socket handlers run between pages
+        socketio.sleep(0)
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def export_game(game_id, table, fmt):
+    """Generator of CSV / NDJSON text chunks for one table of a game's results."""
+    columns, chunks = (PLAYER_COLUMNS, _player_chunks) if table == 'players' else (ANSWER_COLUMNS, _answer_chunks)
+
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for chunk in chunks(game_id):
+            writer.writerows(chunk)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        for chunk in chunks(game_id):
+            yield ''.join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n' for row in chunk)
@@ -2,30 +2,82 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_socketio import SocketIO
 from flask_cors import CORS
 import redis
+import metrics
+
+import os
+
+
+class InstrumentedSocketIO(SocketIO):
+    # Counts fan-out per room kind (direct emits to the calling socket are 'direct')
+    def emit(self, event, *args, **kwargs):
+        room = kwargs.get('to') or kwargs.get('room')
+        if room is not None:
+            from flask import has_request_context, request
+            if has_request_context() and getattr(request, 'sid', None) == room:
+                metrics.count_emit('direct', 1)
+            else:
+                recipients = self.server.manager.rooms.get(kwargs.get('namespace') or '/', {}).get(room, {}) if self.server else {}
+                metrics.count_emit(room, len(recipients))
+        return super().emit(event, *args, **kwargs)
+
+
+class InstrumentedConnection(metrics.InstrumentedConnectionMixin, redis.Connection):
+    pass
+
+
+class InstrumentedSSLConnection(metrics.InstrumentedConnectionMixin, redis.SSLConnection):
+    pass
+
 
 db = SQLAlchemy()
-socketio = SocketIO(cors_allowed_origins="*")
+# With several worker processes/nodes, room emits go through a Redis message queue
+# (e.g. SOCKETIO_MESSAGE_QUEUE=redis://localhost:6379/0) so every worker can reach every room.
+# SOCKETIO_SERIALIZER=msgpack encodes packets in binary (clients must use the msgpack parser).
+# The options go to init_app() in create_app: given to SocketIO() with a message_queue,
+# the server would be built right here and init_app() would replace it with one
+# without the @socketio.on handlers.
+socketio_options = {
+    option: os.getenv(env)
+    for option, env in (('message_queue', 'SOCKETIO_MESSAGE_QUEUE'),
+                        ('async_mode', 'SOCKETIO_ASYNC_MODE'),
+                        ('serializer', 'SOCKETIO_SERIALIZER'))
+    if os.getenv(env)
+}
+socketio = InstrumentedSocketIO(cors_allowed_origins="*")
 cors = CORS()
 
-import os
-
 # Initialize Redis here to avoid circular import issues
-# Use a default or env var if needed
+# One shared, bounded pool per process (see connections.py for warm-up and /api/health):
+# a command waits up to REDIS_POOL_TIMEOUT for a free connection instead of opening
+# one more, and connections idle longer than REDIS_HEALTH_CHECK_INTERVAL are pinged
+# before use so a dropped connection never fails a game event.
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))
+REDIS_POOL_TIMEOUT = float(os.getenv('REDIS_POOL_TIMEOUT', 5))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv('REDIS_HEALTH_CHECK_INTERVAL', 30))
+REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 5))
+
 try:
     redis_host = os.getenv('REDIS_HOST', 'localhost')
     redis_port = int(os.getenv('REDIS_PORT', 6379))
     redis_password = os.getenv('REDIS_PASSWORD', None)
     
-    redis_client = redis.Redis(
+    # Upstash usually requires SSL. The connection classes count commands/round trips (metrics.py)
+    redis_pool = redis.BlockingConnectionPool(
+        connection_class=InstrumentedSSLConnection if redis_password else InstrumentedConnection,
         host=redis_host, 
         port=redis_port, 
         password=redis_password,
-        ssl=True if redis_password else False, # Upstash usually requires SSL
         db=0, 
-        decode_responses=True
+        decode_responses=True,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_keepalive=True
     )
+    redis_client = redis.Redis(connection_pool=redis_pool)
 except Exception as e:
     print(f"Redis connection failed: {e}")
+    redis_pool = None
     redis_client = None
-
-
@@ -0,0 +1,72 @@
+import os
+import logging
+from datetime import datetime
+from sqlalchemy import case, update
+from extensions import db, socketio, redis_client
+from models import Game, Player
+from leaderboard import scores_key
+from writers import flush_answers
+from pins import resolve_pin, set_status
+from keyspace import GAME_TTL
+
+logger = logging.getLogger(__name__)
+
+# Game-over finalization
+# Runs as a background task so the next_question handler returns immediately.
+# Final scores are read from Redis in one pass and written with a bulk
+# UPDATE ... SET final_score = CASE id WHEN .. THEN .. END (one statement per chunk).
+FINALIZE_CHUNK_SIZE = int(os.getenv('FINALIZE_CHUNK_SIZE', 1000))
+
+
+def finalized_key(pin):
+    return f"game:{pin}:finalized"
+
+
+def finalize_game(app, pin):
+    # Only the first game_over of a game schedules the job
+    if not redis_client.set(finalized_key(pin), 1, nx=True, ex=GAME_TTL):
+        return False
+    socketio.start_background_task(_finalize_in_context, app, pin)
+    return True
+
+
+def _finalize_in_context(app, pin):
+    with app.app_context():
+        try:
+            _finalize(pin)
+        except Exception as e:
+            db.session.rollback()
+            # Allow a later game_over (or an admin) to retry
+            redis_client.delete(finalized_key(pin))
+            logger.exception("Error finalizing game %s: %s", pin, e)
+        finally:
+            db.session.remove()
+
+
+def _finalize(pin):
+    # Every pending player and answer of the game goes to MySQL first
+    flush_answers()
+
+    resolved = resolve_pin(pin)
+    game = Game.query.get(resolved['game_id']) if resolved else None
+    if not game:
+        return
+
+    scores = redis_client.zrange(scores_key(pin), 0, -1, withscores=True)
+    final_scores = {int(pid): int(score) for pid, score in scores}
+
+    player_ids = list(final_scores)
+    for start in range(0, len(player_ids), FINALIZE_CHUNK_SIZE):
+        chunk = {pid: final_scores[pid] for pid in player_ids[start:start + FINALIZE_CHUNK_SIZE]}
+        db.session.execute(
+            update(Player)
+            .where(Player.game_id == game.id, Player.id.in_(list(chunk)))
+            .values(final_score=case(chunk, value=Player.id))
+            .execution_options(synchronize_session=False)
+        )
+
+    game.status = 'FINISHED'
+    game.finished_at = datetime.utcnow()
+    db.session.commit()
+    set_status(pin, game.id, 'FINISHED')
+    logger.info("Game %s finalized: %s final scores saved", pin, len(final_scores))
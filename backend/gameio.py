@@ -0,0 +1,75 @@
+from extensions import db, socketio, redis_client
+
+# Engine-agnostic I/O for the game flow
+# The game logic (pins, cache, leaderboard, broadcast, lifecycle, prefetch, roster,
+# sessions, scoring, handlers) is written once, as `async def` functions that do all
+# their I/O through a GameIO object passed as first argument (`io`):
+#   await io.run(io.redis.hget(...))            a Redis command / pipeline.execute()
+#   await io.run(io.script(LUA)(keys, args))    a Lua script
+#   await io.emit(...), io.enter_room, io.disconnect, io.sleep, io.start_task, io.fetch
+#
+# SyncIO (Flask-SocketIO, eventlet or threading) completes every call on the spot, so
+# those coroutines never suspend and run_sync() drives them to the end in the calling
+# greenlet. AsyncIO (async_engine.py) awaits redis.asyncio, the AsyncServer and an
+# async SQLAlchemy engine instead.
+
+
+def run_sync(coro):
+    """Run a game flow coroutine on SyncIO (it never suspends) and return its result."""
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    coro.close()
+    raise RuntimeError("Game flow suspended on synchronous I/O")
+
+
+class GameIO:
+    """Script registry shared by both engines (one registration per Lua source)."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self._scripts = {}
+
+    def script(self, lua):
+        script = self._scripts.get(lua)
+        if script is None:
+            script = self._scripts[lua] = self.redis.register_script(lua)
+        return script
+
+
+class SyncIO(GameIO):
+    def __init__(self, socketio, redis):
+        super().__init__(redis)
+        self.socketio = socketio
+
+    async def run(self, result):
+        # Redis calls already returned their value
+        return result
+
+    async def emit(self, event, data=None, to=None):
+        # InstrumentedSocketIO counts the fan-out
+        self.socketio.emit(event, *([] if data is None else [data]), to=to)
+
+    async def enter_room(self, sid, room):
+        self.socketio.server.enter_room(sid, room, namespace='/')
+
+    async def disconnect(self, sid):
+        self.socketio.server.disconnect(sid, namespace='/')
+
+    async def sleep(self, seconds):
+        self.socketio.sleep(seconds)
+
+    def start_task(self, flow, *args):
+        self.socketio.start_background_task(lambda: run_sync(flow(*args)))
+
+    async def fetch(self, statement):
+        return db.session.execute(statement).all()
+
+    async def finalize(self, pin):
+        from flask import current_app
+        from finalize import finalize_game
+        finalize_game(current_app._get_current_object(), pin)
+
+
+sync_io = SyncIO(socketio, redis_client)
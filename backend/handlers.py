@@ -0,0 +1,231 @@
+import time
+import logging
+from cache import load_questions, get_question, public_question
+from leaderboard import add_player, get_top, get_top_snapshot
+from broadcast import start_broadcaster, get_settings
+from lifecycle import open_question, close_question, get_duration
+from prefetch import take_prefetched, send_prefetch_to, REVEAL_LEAD
+from scoring import submit_answer as run_submit_answer
+from writers import PLAYER_ID_SEQ_KEY, enqueue_player
+from pins import lookup_pin
+from sessions import create_session, resume_session
+from roster import host_room, queue_join, start_announcer, send_roster, track_player, player_disconnected, player_returned
+from metrics import debug_sampled
+from ratelimit import forget_sid
+
+logger = logging.getLogger(__name__)
+
+# Socket event flows, shared by both engines
+# events.py (Flask-SocketIO) and async_engine.py (python-socketio AsyncServer) only
+# register these with their timing and rate limit; `io` is the engine's GameIO (gameio.py).
+
+
+async def join_game(io, sid, data):
+    pin = data.get('pin')
+    nickname = data.get('nickname')
+
+    # Game id and status from the PIN cache (game:{pin}), no MySQL round trip
+    game = await lookup_pin(io, pin, live_only=True)
+    if not game:
+        await io.emit('error', {'message': 'Game not found or inactive'}, to=sid)
+        return
+
+    if game['status'] != 'ACTIVE' and nickname != 'ADMIN':
+        # The local copy may predate the PREPARED -> ACTIVE switch, ask Redis again
+        game = await lookup_pin(io, pin, live_only=True, fresh=True)
+        if not game or game['status'] != 'ACTIVE':
+            await io.emit('error', {'message': 'Game is not active yet'}, to=sid)
+            return
+
+    await io.enter_room(sid, pin)
+
+    # Special handling for Admin/Host Display
+    if nickname in ['ADMIN', 'HOST_DISPLAY']:
+        await io.enter_room(sid, host_room(pin))
+        if nickname == 'ADMIN':
+            await io.enter_room(sid, f"admin_{pin}")
+
+        # Sync existing players to this admin/host in one payload (or just the changes
+        # since the roster version it already has)
+        await send_roster(io, pin, sid, data.get('roster_version'))
+        return # Stop here, don't create a player record for Admin/Host
+
+    # Join fast path: id from a Redis counter, the Kahoo_players row is bulk-inserted
+    # later by the write-behind writer and the host gets joins in batches
+    player_id = await io.run(io.redis.incr(PLAYER_ID_SEQ_KEY))
+
+    pipe = io.redis.pipeline()
+    add_player(pin, player_id, nickname, pipe)
+    enqueue_player(player_id, game['game_id'], nickname, pipe)
+    resume_token = create_session(pin, player_id, sid, pipe)
+    queue_join(pin, player_id, nickname, pipe)
+    # Late-join sync rides on the same round trip
+    pipe.hget(f"game:{pin}", "current_question_index")
+    results = await io.run(pipe.execute())
+    owns_announcer, current_index = results[-2], results[-1]
+    if owns_announcer:
+        start_announcer(io, pin)
+
+    track_player(sid, pin, player_id)
+    await io.emit('joined_success', {'game_id': game['game_id'], 'player_id': player_id, 'resume_token': resume_token}, to=sid)
+
+    # If the game is already in progress (has a question index), send the current question
+    if current_index is not None:
+        current_index = int(current_index)
+        # Served from the question set cache, no MySQL round trip
+        question, _ = await get_question(io, pin, current_index)
+        if question:
+            await io.emit('new_question', public_question(question, current_index), to=sid)
+        # Results phase of a prefetch game: the next question is already staged
+        await send_prefetch_to(io, pin, sid)
+
+
+async def resume_game(io, sid, data):
+    # Reconnect with the token of joined_success: same player, score and question,
+    # restored from Redis without creating a new player
+    pin = data.get('pin')
+    session = await resume_session(io, pin, data.get('resume_token'), sid)
+    if not session:
+        await io.emit('resume_failed', {'message': 'Session expired, please join again'}, to=sid)
+        return
+
+    await io.enter_room(sid, pin)
+    track_player(sid, pin, session['player_id'])
+    await player_returned(io, pin, session['player_id'], session['nickname'])
+    await io.emit('resumed', {
+        'player_id': session['player_id'],
+        'nickname': session['nickname'],
+        'score': session['score'],
+        'rank': session['rank']
+    }, to=sid)
+
+    if session['finished']:
+        await io.emit('game_over', to=sid)
+        return
+    if session['question']:
+        question_data = public_question(session['question'], session['current_index'])
+        question_data['answered'] = session['answered']
+        await io.emit('new_question', question_data, to=sid)
+    await send_prefetch_to(io, pin, sid)
+
+
+async def start_game(io, sid, data):
+    pin = data.get('pin')
+    if await io.run(io.redis.exists(f"game:{pin}")):
+        # Cache the whole question set once so the game never re-queries MySQL per question
+        game = await lookup_pin(io, pin)
+        if game:
+            await load_questions(io, pin, game['game_id'])
+
+        await io.emit('game_started', to=pin)
+        await advance(io, pin)
+
+
+async def next_question(io, sid, data):
+    await advance(io, data.get('pin'))
+
+
+async def advance(io, pin):
+    # Close the current question if the host advances before its deadline
+    # (sends its question_closed summary and final leaderboard)
+    previous_index = await io.run(io.redis.hget(f"game:{pin}", "current_question_index"))
+    if previous_index is not None and int(previous_index) >= 0:
+        await close_question(io, pin, int(previous_index))
+
+    current_index = await io.run(io.redis.hincrby(f"game:{pin}", "current_question_index", 1))
+
+    # Get question from the Redis question set cache
+    question, _ = await get_question(io, pin, current_index)
+
+    if question:
+        duration = await get_duration(io, pin)
+
+        if await take_prefetched(io, pin, current_index):
+            # Clients already have the question: tiny reveal with a common start time
+            start_at = time.time() + REVEAL_LEAD
+            await open_question(io, pin, current_index, question['correct_index'], duration, start_at)
+            await io.emit('reveal_question', {
+                'index': current_index,
+                'start_at': start_at,
+                'start_in': REVEAL_LEAD,
+                'duration': duration
+            }, to=pin)
+        else:
+            # Store correct answer, start time and deadline; schedule the auto-close
+            await open_question(io, pin, current_index, question['correct_index'], duration)
+
+            question_data = public_question(question, current_index)
+            question_data['duration'] = duration
+            await io.emit('new_question', question_data, to=pin)
+        await start_broadcaster(io, pin, current_index)
+    else:
+        # Game Over
+        await io.run(io.redis.hset(f"game:{pin}", "is_active", 0))
+        await io.emit('game_over', to=pin)
+        # Flush answers, save final scores and mark the game FINISHED in the background
+        await io.finalize(pin)
+
+
+async def leaderboard_sync(io, sid, data):
+    # A client without the previous leaderboard version (just joined, reconnected or
+    # missed a delta) asks for the current state, in the game's wire format
+    pin = data.get('pin')
+    if (await get_settings(io, pin))[2]:
+        await io.emit('leaderboard_snapshot', await get_top_snapshot(io, pin), to=sid)
+    else:
+        await io.emit('update_leaderboard', await get_top(io, pin), to=sid)
+
+
+async def submit_answer(io, sid, data):
+    debug_sampled(logger, "Raw submit_answer data: %s", data)
+    player_id = data.get('player_id')
+    answer_index = data.get('answer_index')
+    pin = data.get('pin')
+    client_q_index = data.get('question_index') # Client sends the index it answers
+
+    if not pin:
+        logger.warning("Missing PIN in submit_answer")
+        await io.emit('error', {'message': 'Missing game PIN. Please rejoin.'}, to=sid)
+        return
+
+    try:
+        player_id = int(player_id)
+        answer_index = int(answer_index)
+        client_q_index = int(client_q_index) if client_q_index is not None else None
+    except (TypeError, ValueError):
+        logger.warning("Error converting player id / indices to int: %s, %s, %s", player_id, answer_index, client_q_index)
+        return
+
+    # Validate index, record answer, score and rank in a single atomic Redis script
+    result = await run_submit_answer(io, pin, player_id, answer_index, client_q_index, sid)
+
+    # If client is answering an old question (lag), ignore it.
+    if result['status'] == 'no_game':
+        await io.emit('error', {'message': 'Game not found or inactive'}, to=sid)
+        return
+    if result['status'] == 'unknown_player':
+        await io.emit('error', {'message': 'Unknown player. Please rejoin.'}, to=sid)
+        return
+    if result['status'] == 'late':
+        await io.emit('error', {'message': f"Too late! Client: {client_q_index}, Server: {result['current_index']}"}, to=sid)
+        return
+    if result['status'] == 'closed':
+        await io.emit('error', {'message': 'Too late! The question is closed'}, to=sid)
+        return
+    if result['status'] == 'duplicate':
+        # First answer wins; resends are dropped before any scoring or broadcast
+        return
+
+    debug_sampled(logger, "Answer: %s, Correct: %s, Points: %s", answer_index, result['correct'], result['points_added'])
+
+    await io.emit('answer_result', {
+        'correct': result['correct'],
+        'score': result['score'],
+        'points_added': result['points_added'], # Optional: show how many points they got
+        'rank': result['rank']
+    }, to=sid)
+
+
+async def disconnect(io, sid):
+    forget_sid(sid)
+    player_disconnected(io, sid)
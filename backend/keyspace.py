@@ -0,0 +1,145 @@
+import os
+import logging
+from extensions import socketio, redis_client
+
+logger = logging.getLogger(__name__)
+
+# Redis key lifecycle
+# Every key of a game lives under game:{pin} and carries a TTL:
+#   - GAME_TTL while the game is in use, refreshed when it starts and on every question
+#   - FINISHED_TTL once it is FINISHED (everything that matters is in MySQL by then)
+# Per-question keys (answers:{i}, counts:{i}) get theirs when the question opens/closes.
+# A background sweeper SCANs game:* for keys left without a TTL: orphans of an expired
+# game are deleted, the others inherit the TTL of their game.
+GAME_TTL = int(os.getenv('GAME_TTL', 86400))
+FINISHED_TTL = int(os.getenv('FINISHED_TTL', 3600))
+SWEEP_INTERVAL = float(os.getenv('KEY_SWEEP_INTERVAL', 600))
+SWEEP_LOCK_KEY = "keyspace:sweep_lock"
+SCAN_COUNT = 1000
+
+# Keys of a game besides game:{pin} itself (see the modules that own them)
+GAME_KEY_SUFFIXES = (
+    'players', 'scores', 'correct_answers', 'questions', # leaderboard.py, lifecycle.py, cache.py
+    'roster', 'roster_announced', 'left', # roster.py
+    'sessions', 'sids', # sessions.py
+    'lb_last', 'finalized', # leaderboard.py, finalize.py
+)
+# Per-question keys: game:{pin}:<prefix>:{index}
+QUESTION_KEY_PREFIXES = ('answers', 'counts')
+
+
+def game_keys(pin):
+    return [f"game:{pin}"] + [f"game:{pin}:{suffix}" for suffix in GAME_KEY_SUFFIXES]
+
+
+def question_keys(pin, index):
+    return [f"game:{pin}:{prefix}:{index}" for prefix in QUESTION_KEY_PREFIXES]
+
+
+def touch_game(pin, ttl=GAME_TTL, pipe=None, question_count=0):
+    """(Re)apply `ttl` to the game keys, and to the keys of its first `question_count` questions."""
+    target = pipe if pipe is not None else redis_client.pipeline()
+    keys = game_keys(pin)
+    for index in range(question_count):
+        keys.extend(question_keys(pin, index))
+    for key in keys:
+        target.expire(key, ttl)
+    if pipe is None:
+        target.execute()
+
+
+def expire_finished(pin):
+    """Shorten every key of a finished game to FINISHED_TTL."""
+    current = redis_client.hget(f"game:{pin}", "current_question_index")
+    touch_game(pin, FINISHED_TTL, question_count=int(current) + 1 if current is not None else 0)
+
+
+def _pin_of(key):
+    # game:{pin} or game:{pin}:...
+    return key.split(':')[1]
+
+
+def sweep():
+    """One SCAN pass over game:*. Returns (keys deleted, keys given a TTL)."""
+    deleted = expired = 0
+    for batch in _scan_batches('game:*'):
+        pipe = redis_client.pipeline()
+        for key in batch:
+            pipe.ttl(key)
+        no_ttl = [key for key, ttl in zip(batch, pipe.execute()) if ttl == -1]
+        if not no_ttl:
+            continue
+
+        # TTL of the owning game:{pin} (-2 when it is gone)
+        pins = sorted({_pin_of(key) for key in no_ttl})
+        pipe = redis_client.pipeline()
+        for pin in pins:
+            pipe.ttl(f"game:{pin}")
+        game_ttls = dict(zip(pins, pipe.execute()))
+
+        pipe = redis_client.pipeline()
+        for key in no_ttl:
+            game_ttl = game_ttls[_pin_of(key)]
+            if key == f"game:{_pin_of(key)}" or game_ttl == -1:
+                pipe.expire(key, GAME_TTL)
+                expired += 1
+            elif game_ttl == -2:
+                pipe.unlink(key)
+                deleted += 1
+            else:
+                pipe.expire(key, game_ttl)
+                expired += 1
+        pipe.execute()
+    return deleted, expired
+
+
+def _scan_batches(match):
+    cursor = 0
+    while True:
+        cursor, keys = redis_client.scan(cursor=cursor, match=match, count=SCAN_COUNT)
+        if keys:
+            yield keys
+        if cursor == 0:
+            return
+
+
+def memory_report(top=50):
+    """Per-game key count and bytes (MEMORY USAGE), biggest games first."""
+    games = {}
+    for batch in _scan_batches('game:*'):
+        pipe = redis_client.pipeline()
+        for key in batch:
+            pipe.memory_usage(key)
+        for key, size in zip(batch, pipe.execute()):
+            game = games.setdefault(_pin_of(key), {'pin': _pin_of(key), 'keys': 0, 'bytes': 0})
+            game['keys'] += 1
+            game['bytes'] += size or 0
+
+    info = redis_client.info('memory')
+    ranked = sorted(games.values(), key=lambda g: g['bytes'], reverse=True)
+    return {
+        'used_memory': info.get('used_memory'),
+        'used_memory_human': info.get('used_memory_human'),
+        'games': len(ranked),
+        'game_keys': sum(g['keys'] for g in ranked),
+        'game_bytes': sum(g['bytes'] for g in ranked),
+        'top': ranked[:top]
+    }
+
+
+def start_sweeper():
+    socketio.start_background_task(_sweep_loop)
+
+
+def _sweep_loop():
+    while True:
+        socketio.sleep(SWEEP_INTERVAL)
+        # One worker sweeps at a time
+        if not redis_client.set(SWEEP_LOCK_KEY, 1, nx=True, ex=int(SWEEP_INTERVAL)):
+            continue
+        try:
+            deleted, expired = sweep()
+            if deleted or expired:
+                logger.info("Key sweep: %s orphan keys deleted, %s keys given a TTL", deleted, expired)
+        except Exception as e:
+            logger.exception("Key sweep error: %s", e)
@@ -0,0 +1,128 @@
+import os
+from extensions import redis_client
+from keyspace import GAME_TTL
+
+# Live scores are a Redis SORTED SET (game:{pin}:scores, member=player_id, score=points).
+# ZINCRBY keeps it ordered on write, so reading the leaderboard is a top-K ZREVRANGE
+# and a player's position is a single ZREVRANK, no full table in Python.
+LEADERBOARD_TOP_K = int(os.getenv('LEADERBOARD_TOP_K', 10))
+
+# Compact mode: the last top-K sent to the room is kept in game:{pin}:lb_last
+# (HASH player_id -> "score:rank") with its version in game:{pin} (lb_version), so
+# each update only carries the entries that changed. Diff, store and version bump
+# happen in one script, whichever worker emits.
+TOP_DELTA_LUA = """
+local top = redis.call('ZREVRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1, 'WITHSCORES')
+local last = redis.call('HGETALL', KEYS[2])
+local previous = {}
+for i = 1, #last, 2 do
+    previous[last[i]] = last[i + 1]
+end
+
+local changes, entered, current, stored = {}, {}, {}, {}
+for i = 1, #top, 2 do
+    local id, rank = top[i], (i + 1) / 2
+    local value = top[i + 1] .. ':' .. rank
+    current[id] = true
+    stored[#stored + 1] = id
+    stored[#stored + 1] = value
+    if previous[id] ~= value then
+        changes[#changes + 1] = {id, top[i + 1], rank}
+        if previous[id] == nil then
+            entered[#entered + 1] = id
+        end
+    end
+end
+local removed = {}
+for id, _ in pairs(previous) do
+    if not current[id] then
+        removed[#removed + 1] = id
+    end
+end
+
+if #changes == 0 and #removed == 0 then
+    return {0, {}, {}, {}}
+end
+redis.call('DEL', KEYS[2])
+if #stored > 0 then
+    redis.call('HSET', KEYS[2], unpack(stored))
+    redis.call('EXPIRE', KEYS[2], ARGV[2])
+end
+return {redis.call('HINCRBY', KEYS[3], 'lb_version', 1), changes, removed, entered}
+"""
+
+def scores_key(pin):
+    return f"game:{pin}:scores"
+
+
+def players_key(pin):
+    return f"game:{pin}:players"
+
+
+def last_top_key(pin):
+    return f"game:{pin}:lb_last"
+
+
+def add_player(pin, player_id, nickname, pipe=None):
+    """Register a player with 0 points. Uses the given pipeline if provided."""
+    target = pipe if pipe is not None else redis_client.pipeline()
+    target.hset(players_key(pin), player_id, nickname)
+    target.zadd(scores_key(pin), {str(player_id): 0}, nx=True)
+    if pipe is None:
+        target.execute()
+
+
+async def get_top(io, pin, k=None):
+    """Top-K leaderboard as a list of {'nickname', 'score', 'rank'} (rank is 1-based)."""
+    k = k or LEADERBOARD_TOP_K
+    top = await io.run(io.redis.zrevrange(scores_key(pin), 0, k - 1, withscores=True))
+    if not top:
+        return []
+
+    # Only fetch the names we are going to show
+    names = await io.run(io.redis.hmget(players_key(pin), [pid for pid, _ in top]))
+    return [
+        {'nickname': name or "Unknown", 'score': int(score), 'rank': i + 1}
+        for i, ((pid, score), name) in enumerate(zip(top, names))
+    ]
+
+
+async def get_top_delta(io, pin, k=None):
+    """
+    Changes of the top-K since the last call, or None if nothing changed:
+    {'v': version, 'changes': [[id, score, rank]], 'removed': [id], 'names': {id: nickname}}
+    names only covers ids that just entered the top-K (clients keep the ones they saw).
+    """
+    version, changes, removed, entered = await io.run(io.script(TOP_DELTA_LUA)(
+        keys=[scores_key(pin), last_top_key(pin), f"game:{pin}"],
+        args=[k or LEADERBOARD_TOP_K, GAME_TTL]
+    ))
+    if not version:
+        return None
+    names = await io.run(io.redis.hmget(players_key(pin), entered)) if entered else []
+    return {
+        'v': version,
+        'changes': [[int(pid), int(float(score)), int(rank)] for pid, score, rank in changes],
+        'removed': [int(pid) for pid in removed],
+        'names': {int(pid): name or "Unknown" for pid, name in zip(entered, names)}
+    }
+
+
+async def get_top_snapshot(io, pin):
+    """The last top-K sent in compact mode, for a client that missed a version."""
+    pipe = io.redis.pipeline(transaction=True)
+    pipe.hget(f"game:{pin}", "lb_version")
+    pipe.hgetall(last_top_key(pin))
+    version, last = await io.run(pipe.execute())
+
+    entries = []
+    for pid, value in last.items():
+        score, rank = value.split(':')
+        entries.append([int(pid), int(float(score)), int(rank)])
+    entries.sort(key=lambda entry: entry[2])
+    names = await io.run(io.redis.hmget(players_key(pin), list(last))) if last else []
+    return {
+        'v': int(version or 0),
+        'entries': entries,
+        'names': {int(pid): name or "Unknown" for pid, name in zip(last, names)}
+    }
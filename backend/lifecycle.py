@@ -0,0 +1,83 @@
+import os
+import time
+from broadcast import flush_leaderboard, counts_key, counts_dirty_key
+from prefetch import stage_next_question
+from keyspace import GAME_TTL, touch_game, question_keys
+
+# Server-driven question lifecycle
+# Opening a question stores its deadline in game:{pin}; a background task closes it
+# at the deadline (or the host closes it early with next_question). Closing is done
+# once by a Lua check-and-set, then one 'question_closed' summary goes to the room.
+# Answers after the deadline are rejected inside the submit script.
+#
+# Per-option answer counts (see broadcast.py) are incremented by the submit script,
+# so the summary and the host histogram never scan answer hashes.
+QUESTION_DURATION = float(os.getenv('QUESTION_DURATION', 20))
+QUESTION_DURATION_MIN = 1
+QUESTION_DURATION_MAX = 3600
+
+CLOSE_QUESTION_LUA = """
+local current, is_open = unpack(redis.call('HMGET', KEYS[1], 'current_question_index', 'question_open'))
+if current == ARGV[1] and is_open == '1' then
+    redis.call('HSET', KEYS[1], 'question_open', 0)
+    return 1
+end
+return 0
+"""
+
+async def get_duration(io, pin):
+    duration = await io.run(io.redis.hget(f"game:{pin}", "question_duration"))
+    duration = float(duration) if duration else QUESTION_DURATION
+    return min(max(duration, QUESTION_DURATION_MIN), QUESTION_DURATION_MAX)
+
+
+async def open_question(io, pin, index, correct_index, duration, start_at=None):
+    # start_at may be slightly in the future (prefetch reveal), scoring counts from it
+    now = time.time()
+    start_at = start_at or now
+    pipe = io.redis.pipeline()
+    # Cache correct answer in Redis for quick validation
+    pipe.hset(f"game:{pin}:correct_answers", index, correct_index)
+    # Start time for scoring, deadline for closing
+    pipe.hset(f"game:{pin}", mapping={
+        "question_start_time": start_at,
+        "question_deadline": start_at + duration,
+        "question_open": 1
+    })
+    pipe.delete(counts_key(pin, index))
+    # Activity: push the TTL of every game key forward
+    touch_game(pin, pipe=pipe)
+    await io.run(pipe.execute())
+    io.start_task(_close_at_deadline, io, pin, index, start_at + duration - now)
+
+
+async def _close_at_deadline(io, pin, index, delay):
+    await io.sleep(delay)
+    await close_question(io, pin, index)
+
+
+async def close_question(io, pin, index):
+    """Close the question if it is still the open one. Returns True if this call closed it."""
+    if not await io.run(io.script(CLOSE_QUESTION_LUA)(keys=[f"game:{pin}"], args=[index])):
+        return False
+
+    pipe = io.redis.pipeline()
+    pipe.hgetall(counts_key(pin, index))
+    pipe.hget(f"game:{pin}:correct_answers", index)
+    pipe.delete(counts_dirty_key(pin))
+    # The per-question keys were created by the submit script without a TTL
+    for key in question_keys(pin, index):
+        pipe.expire(key, GAME_TTL)
+    counts, correct_index = (await io.run(pipe.execute()))[:2]
+
+    counts = {option: int(n) for option, n in counts.items()}
+    await flush_leaderboard(io, pin)
+    await io.emit('question_closed', {
+        'index': index,
+        'counts': counts,
+        'total_answers': sum(counts.values()),
+        'correct_index': int(correct_index) if correct_index is not None else None
+    }, to=pin)
+    # Results phase: stage the next question on the clients if the game uses prefetch
+    await stage_next_question(io, pin, index + 1)
+    return True
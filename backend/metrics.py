@@ -0,0 +1,188 @@
+import os
+import time
+import random
+import logging
+import inspect
+import threading
+import functools
+import contextvars
+from collections import defaultdict
+
+# Hot-path instrumentation, exposed in Prometheus text format at /api/metrics
+#  - latency histograms for every socket event and Flask route
+#  - Redis commands / round trips and SQL queries, labelled by the event or route
+#    that issued them (the "scope")
+#  - fan-out: messages emitted and local recipients, per room kind (game/host/admin/direct)
+# Metrics are kept per process; with several workers scrape each one.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', 0.01)) # share of hot-path debug lines kept
+
+_lock = threading.Lock()
+_histograms = {} # (kind, name) -> [bucket counts..., +Inf count, sum]
+_counters = defaultdict(float) # (metric, labels tuple) -> value
+# Per thread, greenlet and asyncio task (a new task starts from a copy of its creator's)
+_scope = contextvars.ContextVar('metrics_scope', default=None)
+
+
+def current_scope():
+    return _scope.get() or 'background'
+
+
+def _enter_scope(name):
+    previous = _scope.get()
+    _scope.set(name)
+    return previous
+
+
+def _exit_scope(previous):
+    _scope.set(previous)
+
+
+def background_scope():
+    """Label what runs next in this context as 'background' (asyncio background tasks)."""
+    _scope.set(None)
+
+
+def observe(kind, name, seconds):
+    with _lock:
+        hist = _histograms.get((kind, name))
+        if hist is None:
+            hist = _histograms[(kind, name)] = [0] * (len(LATENCY_BUCKETS) + 2)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                hist[i] += 1
+        hist[len(LATENCY_BUCKETS)] += 1 # +Inf
+        hist[-1] += seconds
+
+
+def inc(metric, value=1, **labels):
+    with _lock:
+        _counters[(metric, tuple(sorted(labels.items())))] += value
+
+
+def timed_event(name):
+    """Records latency (and Redis/SQL usage) of a socket event handler (sync or async)."""
+    def decorator(f):
+        if inspect.iscoroutinefunction(f):
+            @functools.wraps(f)
+            async def async_wrapper(*args, **kwargs):
+                previous = _enter_scope(f"socket:{name}")
+                start = time.perf_counter()
+                try:
+                    return await f(*args, **kwargs)
+                finally:
+                    observe('socket', name, time.perf_counter() - start)
+                    _exit_scope(previous)
+            return async_wrapper
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            previous = _enter_scope(f"socket:{name}")
+            start = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                observe('socket', name, time.perf_counter() - start)
+                _exit_scope(previous)
+        return wrapper
+    return decorator
+
+
+def init_app(app):
+    """Times every Flask route and counts SQLAlchemy queries."""
+    from flask import request, g
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+        g._metrics_scope = _enter_scope(f"http:{request.endpoint}")
+
+    @app.teardown_request
+    def _stop_timer(exc):
+        start = g.pop('_metrics_start', None)
+        if start is not None:
+            observe('http', request.endpoint or 'unknown', time.perf_counter() - start)
+            _exit_scope(g.pop('_metrics_scope', None))
+
+    if not event.contains(Engine, 'before_cursor_execute', _count_query):
+        event.listen(Engine, 'before_cursor_execute', _count_query)
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    inc('sql_queries_total', scope=current_scope())
+
+
+def debug_sampled(logger, msg, *args):
+    """Hot-path debug logging: free when DEBUG is off, and only a sample when it is on."""
+    if logger.isEnabledFor(logging.DEBUG) and random.random() < LOG_SAMPLE_RATE:
+        logger.debug(msg, *args)
+
+
+class InstrumentedConnectionMixin:
+    """Counts Redis commands and round trips (one packed send = one round trip)."""
+
+    def pack_command(self, *args):
+        inc('redis_commands_total', scope=current_scope())
+        return super().pack_command(*args)
+
+    def pack_commands(self, commands):
+        commands = list(commands)
+        inc('redis_commands_total', len(commands), scope=current_scope())
+        return super().pack_commands(commands)
+
+    def send_packed_command(self, command, check_health=True):
+        inc('redis_roundtrips_total', scope=current_scope())
+        return super().send_packed_command(command, check_health)
+
+
+def room_kind(room):
+    """Label value for a room: 'host', 'admin', 'game' (a PIN) or 'direct' (a socket id).
+    Room names themselves would be one label value per game, never pruned."""
+    room = str(room)
+    if room.startswith('host_'):
+        return 'host'
+    if room.startswith('admin_'):
+        return 'admin'
+    if room.isdigit():
+        return 'game'
+    return 'direct'
+
+
+def count_emit(room, recipients):
+    kind = room_kind(room)
+    inc('socketio_emits_total', room=kind)
+    inc('socketio_messages_total', recipients, room=kind)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+
+def render_prometheus():
+    lines = []
+    with _lock:
+        histograms = {k: list(v) for k, v in _histograms.items()}
+        counters = dict(_counters)
+
+    for metric, kind in (('socketio_event_duration_seconds', 'socket'), ('http_request_duration_seconds', 'http')):
+        lines.append(f"# TYPE {metric} histogram")
+        for (hist_kind, name), hist in sorted(histograms.items()):
+            if hist_kind != kind:
+                continue
+            label = 'event' if kind == 'socket' else 'endpoint'
+            for bound, count in zip(LATENCY_BUCKETS, hist):
+                lines.append(f'{metric}_bucket{{{label}="{name}",le="{bound}"}} {count}')
+            lines.append(f'{metric}_bucket{{{label}="{name}",le="+Inf"}} {hist[len(LATENCY_BUCKETS)]}')
+            lines.append(f'{metric}_count{{{label}="{name}"}} {hist[len(LATENCY_BUCKETS)]}')
+            lines.append(f'{metric}_sum{{{label}="{name}"}} {hist[-1]:.6f}')
+
+    for metric in sorted({m for m, _ in counters}):
+        lines.append(f"# TYPE {metric} counter")
+        for (name, labels), value in sorted(counters.items()):
+            if name == metric:
+                lines.append(f"{metric}{_format_labels(labels)} {int(value) if value.is_integer() else value}")
+    return '\n'.join(lines) + '\n'
@@ -7,11 +7,18 @@ from datetime import datetime
 class Game(db.Model):
     __tablename__ = 'Kahoo_games'
     id = db.Column(db.Integer, primary_key=True)
-    pin = db.Column(db.String(10), unique=True, nullable=False)
+    pin = db.Column(db.String(10), nullable=False) # unique among live games only (see pinpool.py)
     title = db.Column(db.String(100), nullable=True)
     status = db.Column(db.String(20), default='PREPARED') # PREPARED, ACTIVE, FINISHED
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     finished_at = db.Column(db.DateTime, nullable=True)
+
+    # Keyset pagination of the games listing (newest first, optionally by status)
+    __table_args__ = (
+        db.Index('idx_games_pin', 'pin'),
+        db.Index('idx_games_created', 'created_at', 'id'),
+        db.Index('idx_games_status_created', 'status', 'created_at', 'id'),
+    )
     
     # Relationships
     players = db.relationship('Player', backref='game', lazy=True)
@@ -35,7 +42,8 @@ class Player(db.Model):
 
 class Answer(db.Model):
     __tablename__ = 'Kahoo_answers'
-    id = db.Column(db.BigInteger, primary_key=True)
+    # SQLite (benchmark.py) only autoincrements an INTEGER primary key
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
     game_id = db.Column(db.Integer, db.ForeignKey('Kahoo_games.id'), nullable=False)
     player_id = db.Column(db.Integer, db.ForeignKey('Kahoo_players.id'), nullable=False)
     question_index = db.Column(db.Integer, nullable=False)
@@ -50,6 +58,11 @@ class Question(db.Model):
     options = db.Column(db.JSON, nullable=False)
     correct_option_index = db.Column(db.Integer, nullable=False)
     game_id = db.Column(db.Integer, db.ForeignKey('Kahoo_games.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0) # play order within the game
+
+    __table_args__ = (
+        db.Index('idx_questions_game_position', 'game_id', 'position'),
+    )
 
 class User(db.Model):
     __tablename__ = 'usuarios'
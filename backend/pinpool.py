@@ -0,0 +1,127 @@
+import os
+import time
+import random
+import logging
+from sqlalchemy import or_
+from extensions import db, socketio, redis_client
+from models import Game
+from keyspace import GAME_TTL
+
+logger = logging.getLogger(__name__)
+
+# PIN allocation
+# Free PINs wait in a Redis SET (pins:free). create_game takes one with an atomic
+# SPOP (no other request can get it) and reserves game:{pin} with a check-and-set
+# script, so two games can never get the same PIN and no request depends on luck
+# with random digits.
+# A background job keeps the pool above PIN_POOL_LOW: it draws random candidates and
+# drops the ones in use (live game:{pin} hash, or a game not FINISHED in MySQL).
+# Finished games queue their PIN in pins:releasing; once game:{pin} has expired the
+# PIN goes back to the pool.
+PIN_DIGITS = 6
+PIN_POOL_KEY = "pins:free"
+PIN_RELEASE_KEY = "pins:releasing" # ZSET pin -> finished at
+PIN_POOL_LOCK_KEY = "pins:refill_lock"
+PIN_POOL_LOW = int(os.getenv('PIN_POOL_LOW', 2000))
+PIN_POOL_BATCH = int(os.getenv('PIN_POOL_BATCH', 5000))
+PIN_POOL_INTERVAL = float(os.getenv('PIN_POOL_INTERVAL', 30))
+PIN_QUERY_CHUNK = 1000
+
+# Reserve a popped PIN: create game:{pin} unless it exists (a live game still holds it)
+RESERVE_PIN_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'pin', ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+_reserve_script = redis_client.register_script(RESERVE_PIN_LUA) if redis_client else None
+
+
+def allocate_pin(ttl=GAME_TTL):
+    """A free PIN with game:{pin} reserved for `ttl` seconds, or None if the pool is empty."""
+    pin = _pop_pin(ttl)
+    if pin is None:
+        # Ran dry (first start or a burst of creations): refill now and retry once
+        refill_pool()
+        pin = _pop_pin(ttl)
+    return pin
+
+
+def _pop_pin(ttl):
+    while True:
+        pin = redis_client.spop(PIN_POOL_KEY)
+        if pin is None:
+            return None
+        if _reserve_script(keys=[f"game:{pin}"], args=[pin, ttl]):
+            return pin
+
+
+def release_pin(pin, pipe=None):
+    """Queue a finished game's PIN, it is reused once game:{pin} has expired."""
+    (pipe if pipe is not None else redis_client).zadd(PIN_RELEASE_KEY, {pin: time.time()})
+
+
+def _in_use(pins):
+    pipe = redis_client.pipeline()
+    for pin in pins:
+        pipe.exists(f"game:{pin}")
+    live = {pin for pin, exists in zip(pins, pipe.execute()) if exists}
+
+    for start in range(0, len(pins), PIN_QUERY_CHUNK):
+        chunk = pins[start:start + PIN_QUERY_CHUNK]
+        # Served by idx_games_pin
+        rows = db.session.query(Game.pin).filter(
+            Game.pin.in_(chunk),
+            or_(Game.status != 'FINISHED', Game.status.is_(None))
+        ).all()
+        live.update(pin for (pin,) in rows)
+    return live
+
+
+def refill_pool():
+    """Return released PINs, then add a batch of random free ones if the pool is low. Returns PINs added."""
+    added = 0
+
+    # Finished games whose keys are gone
+    released = redis_client.zrangebyscore(PIN_RELEASE_KEY, '-inf', time.time(), start=0, num=PIN_POOL_BATCH)
+    if released:
+        in_use = _in_use(released)
+        free = [pin for pin in released if pin not in in_use]
+        if free:
+            pipe = redis_client.pipeline()
+            pipe.sadd(PIN_POOL_KEY, *free)
+            pipe.zrem(PIN_RELEASE_KEY, *free)
+            pipe.execute()
+        added += len(free)
+
+    if redis_client.scard(PIN_POOL_KEY) < PIN_POOL_LOW:
+        candidates = [str(n).zfill(PIN_DIGITS) for n in random.sample(range(10 ** PIN_DIGITS), PIN_POOL_BATCH)]
+        in_use = _in_use(candidates)
+        free = [pin for pin in candidates if pin not in in_use]
+        if free:
+            redis_client.sadd(PIN_POOL_KEY, *free)
+        added += len(free)
+    return added
+
+
+def start_pin_pool(app):
+    socketio.start_background_task(_pool_loop, app)
+
+
+def _pool_loop(app):
+    with app.app_context():
+        while True:
+            # One worker refills at a time
+            if redis_client.set(PIN_POOL_LOCK_KEY, 1, nx=True, ex=int(PIN_POOL_INTERVAL)):
+                try:
+                    added = refill_pool()
+                    if added:
+                        logger.info("PIN pool: %s PINs added", added)
+                except Exception as e:
+                    logger.exception("PIN pool refill error: %s", e)
+                finally:
+                    db.session.remove()
+            socketio.sleep(PIN_POOL_INTERVAL)
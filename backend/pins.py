@@ -0,0 +1,133 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from sqlalchemy import func, select
+from extensions import db, redis_client
+from gameio import run_sync, sync_io
+from models import Game
+from pinpool import release_pin
+from keyspace import expire_finished
+
+# PIN -> game resolution
+# game_id and status are stored in game:{pin} at create_game (status is mirrored by
+# update_game_status and finalize), so handlers and routes translate a PIN without SQL.
+# A small per-process LRU with a short TTL sits in front of Redis; MySQL is only
+# asked for games whose hash lacks the fields (e.g. created before they existed),
+# and the answer is written back into the hash.
+PIN_CACHE_SIZE = int(os.getenv('PIN_CACHE_SIZE', 1024))
+PIN_CACHE_TTL = float(os.getenv('PIN_CACHE_TTL', 5)) # seconds a worker may serve a stale status
+# Bumped on every game create / status change, the ETag of the games listing
+GAMES_VERSION_KEY = "games:version"
+
+# Backfill only a live game hash, never resurrect an expired one
+BACKFILL_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('HSET', KEYS[1], 'game_id', ARGV[1], 'status', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+_lock = threading.Lock()
+_local = OrderedDict() # pin -> (expires_at, {'game_id', 'status'})
+
+
+def cached_pin(pin):
+    with _lock:
+        cached = _local.get(pin)
+        if cached is None:
+            return None
+        if cached[0] < time.monotonic():
+            del _local[pin]
+            return None
+        _local.move_to_end(pin)
+        return cached[1]
+
+
+def cache_pin(pin, game):
+    with _lock:
+        _local[pin] = (time.monotonic() + PIN_CACHE_TTL, game)
+        _local.move_to_end(pin)
+        while len(_local) > PIN_CACHE_SIZE:
+            _local.popitem(last=False)
+
+
+def resolve_pin(pin, live_only=False, fresh=False):
+    """
+    Returns {'game_id': int, 'status': str} for a PIN, or None if there is no such game.
+    live_only: None when game:{pin} does not exist (expired or never created), without MySQL.
+    fresh: skip the in-process layer (e.g. to re-check a status that may just have changed).
+    """
+    return run_sync(lookup_pin(sync_io, pin, live_only, fresh))
+
+
+async def lookup_pin(io, pin, live_only=False, fresh=False):
+    """resolve_pin as a game flow (see gameio.py)."""
+    if not fresh:
+        game = cached_pin(pin)
+        if game is not None:
+            return game
+
+    exists, game_id, status = False, None, None
+    if io.redis:
+        pipe = io.redis.pipeline()
+        pipe.exists(f"game:{pin}")
+        pipe.hmget(f"game:{pin}", "game_id", "status")
+        exists, (game_id, status) = await io.run(pipe.execute())
+
+    if game_id is not None:
+        game = {'game_id': int(game_id), 'status': status}
+    elif live_only and not exists:
+        return None
+    else:
+        # PINs are reused once a finished game has expired, the newest game owns it
+        rows = await io.fetch(select(Game.id, Game.status).where(Game.pin == pin).order_by(Game.id.desc()).limit(1))
+        if not rows:
+            return None
+        game = {'game_id': rows[0].id, 'status': rows[0].status}
+        if io.redis:
+            await io.run(io.script(BACKFILL_LUA)(keys=[f"game:{pin}"], args=[game['game_id'], game['status']]))
+
+    cache_pin(pin, game)
+    return game
+
+
+def games_version():
+    return redis_client.get(GAMES_VERSION_KEY) or '0'
+
+
+def bump_games_version(pipe=None):
+    (pipe if pipe is not None else redis_client).incr(GAMES_VERSION_KEY)
+
+
+def owns_pin(pin, game_id):
+    """
+    True if game `game_id` may write the game:{pin} keys. PINs of finished games are
+    reused, so an old game must never touch the keys of the live game holding its PIN:
+    the hash has to name it, or (hash gone) it has to be the newest game with the PIN.
+    """
+    owner = redis_client.hget(f"game:{pin}", "game_id")
+    if owner is not None:
+        return int(owner) == game_id
+    return db.session.query(func.max(Game.id)).filter(Game.pin == pin).scalar() == game_id
+
+
+def set_status(pin, game_id, status):
+    """Mirror a status change (call after the MySQL commit)."""
+    if redis_client:
+        if not owns_pin(pin, game_id):
+            # The PIN belongs to a newer game now, only the listing changed
+            bump_games_version()
+            return
+        pipe = redis_client.pipeline()
+        pipe.hset(f"game:{pin}", "status", status)
+        bump_games_version(pipe)
+        if status == 'FINISHED':
+            release_pin(pin, pipe)
+        pipe.execute()
+        if status == 'FINISHED':
+            # Results stay readable for a while, MySQL has the rest
+            expire_finished(pin)
+    # Other workers pick it up when their entry expires (PIN_CACHE_TTL)
+    cache_pin(pin, {'game_id': game_id, 'status': status})
@@ -0,0 +1,50 @@
+import os
+from cache import get_question, public_question
+
+# Optional question prefetch (per game, 'prefetch' in game:{pin})
+# When a question closes, the next question (text and options, never the answer) is
+# pushed to the room in the background as 'prefetch_question' while players look at
+# the results. next_question then only sends a tiny 'reveal_question' with a common
+# start time, instead of serializing the full payload to every socket at once.
+PREFETCH_DEFAULT = os.getenv('PREFETCH_QUESTIONS', '0') == '1'
+REVEAL_LEAD = float(os.getenv('REVEAL_LEAD', 0.3)) # seconds between reveal and start, absorbs delivery jitter
+
+
+async def is_enabled(io, pin):
+    enabled = await io.run(io.redis.hget(f"game:{pin}", "prefetch"))
+    return enabled == '1' if enabled is not None else PREFETCH_DEFAULT
+
+
+async def stage_next_question(io, pin, index):
+    """Push question `index` to the room in the background, if prefetch is on and it exists."""
+    if not await is_enabled(io, pin):
+        return
+    io.start_task(_send_prefetch, io, pin, index)
+
+
+async def _send_prefetch(io, pin, index):
+    question, _ = await get_question(io, pin, index, cache_only=True)
+    if not question:
+        return
+    await io.emit('prefetch_question', public_question(question, index), to=pin)
+    # Flag it only once the push is out, so a reveal never overtakes its prefetch
+    await io.run(io.redis.hset(f"game:{pin}", "prefetched_index", index))
+
+
+async def send_prefetch_to(io, pin, sid):
+    """A socket that joins during the results phase also gets the staged question."""
+    prefetched = await io.run(io.redis.hget(f"game:{pin}", "prefetched_index"))
+    if prefetched is None:
+        return
+    question, _ = await get_question(io, pin, int(prefetched), cache_only=True)
+    if question:
+        await io.emit('prefetch_question', public_question(question, int(prefetched)), to=sid)
+
+
+async def take_prefetched(io, pin, index):
+    """True if question `index` was staged on the clients (consumes the flag)."""
+    pipe = io.redis.pipeline()
+    pipe.hget(f"game:{pin}", "prefetched_index")
+    pipe.hdel(f"game:{pin}", "prefetched_index")
+    prefetched, _ = await io.run(pipe.execute())
+    return prefetched is not None and int(prefetched) == index
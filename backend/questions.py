@@ -0,0 +1,87 @@
+import csv
+import io
+import os
+
+# Question import
+# A quiz (JSON array or CSV upload) is validated as a whole and written with a single
+# multi-row INSERT in one transaction. Questions keep an explicit `position`
+# (index on game_id, position), which is the order the game plays them in.
+#
+# CSV columns: text, correct_index, option1, option2, ... (header row required,
+# option columns are read in order; only trailing options may be left empty, a gap
+# would shift the options after it and make correct_index point to the wrong one).
+QUESTION_IMPORT_MAX = int(os.getenv('QUESTION_IMPORT_MAX', 500))
+MIN_OPTIONS = 2
+MAX_OPTIONS = 4
+MAX_TEXT_LENGTH = 200 # Kahoo_questions.text is VARCHAR(200)
+
+
+class QuestionImportError(ValueError):
+    """Raised with the list of problems found in an import payload."""
+
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+def parse_csv(content):
+    reader = csv.DictReader(io.StringIO(content))
+    if not reader.fieldnames or 'text' not in reader.fieldnames:
+        raise QuestionImportError(["CSV header must include 'text', 'correct_index' and option columns"])
+    option_columns = [name for name in reader.fieldnames if name.startswith('option')]
+
+    items, errors = [], []
+    for number, row in enumerate(reader, start=1):
+        cells = [(row.get(name) or '').strip() for name in option_columns]
+        while cells and not cells[-1]:
+            cells.pop()
+        gaps = [name for name, cell in zip(option_columns, cells) if not cell]
+        if gaps:
+            errors.append(f"#{number} (line {reader.line_num}): {', '.join(gaps)} empty before a later option")
+        items.append({
+            'text': row.get('text'),
+            'correct_index': row.get('correct_index'),
+            'options': cells
+        })
+    if errors:
+        raise QuestionImportError(errors)
+    return items
+
+
+def validate_questions(items):
+    """Returns clean {'text', 'options', 'correct_index'} dicts, or raises QuestionImportError."""
+    if not isinstance(items, list) or not items:
+        raise QuestionImportError(['Expected a non-empty list of questions'])
+    if len(items) > QUESTION_IMPORT_MAX:
+        raise QuestionImportError([f'At most {QUESTION_IMPORT_MAX} questions per import'])
+
+    errors = []
+    questions = []
+    for number, item in enumerate(items, start=1):
+        if not isinstance(item, dict):
+            errors.append(f'#{number}: expected an object')
+            continue
+        text = (item.get('text') or '').strip()
+        options = item.get('options')
+        try:
+            correct_index = int(item.get('correct_index'))
+        except (TypeError, ValueError):
+            correct_index = None
+
+        if not text or len(text) > MAX_TEXT_LENGTH:
+            errors.append(f'#{number}: text is required (max {MAX_TEXT_LENGTH} characters)')
+        if not isinstance(options, list) or not MIN_OPTIONS <= len(options) <= MAX_OPTIONS \
+                or not all(isinstance(opt, str) and opt.strip() for opt in options):
+            errors.append(f'#{number}: between {MIN_OPTIONS} and {MAX_OPTIONS} non-empty options are required')
+        elif correct_index is None or not 0 <= correct_index < len(options):
+            errors.append(f'#{number}: correct_index must point to one of the options')
+        else:
+            questions.append({
+                'text': text,
+                'options': [opt.strip() for opt in options],
+                'correct_index': correct_index
+            })
+
+    if errors:
+        raise QuestionImportError(errors)
+    return questions
@@ -0,0 +1,103 @@
+import os
+import time
+import threading
+import functools
+import inspect
+import logging
+import metrics
+from roster import tracked_player
+
+logger = logging.getLogger(__name__)
+
+# Per-connection backpressure on socket events
+# Token buckets per sid (every event of a socket) and per player (submit_answer, so
+# opening more sockets doesn't buy more attempts). The player is the one the socket
+# joined or resumed as (roster.py), so a forged player_id can't drain someone else's. A client over its budget has the
+# event dropped before any Redis work, so one script can't amplify load onto the room.
+# Buckets live in the worker that owns the websocket; they are throttling state only,
+# nothing about the game depends on them.
+SOCKET_RATE = float(os.getenv('SOCKET_RATE', 5)) # events per second, sustained
+SOCKET_BURST = float(os.getenv('SOCKET_BURST', 20))
+BUCKET_IDLE_TTL = 300 # seconds before an untouched bucket is dropped
+BUCKET_PRUNE_EVERY = 10000 # buckets created between prunes
+
+_lock = threading.Lock()
+_buckets = {} # key -> [tokens, last refill]
+_created = 0
+
+
+def _take(key, now):
+    bucket = _buckets.get(key)
+    if bucket is None:
+        global _created
+        _created += 1
+        bucket = _buckets[key] = [SOCKET_BURST, now]
+    tokens = min(SOCKET_BURST, bucket[0] + (now - bucket[1]) * SOCKET_RATE)
+    bucket[1] = now
+    if tokens < 1:
+        bucket[0] = tokens
+        return False
+    bucket[0] = tokens - 1
+    return True
+
+
+def _prune(now):
+    for key in [k for k, (_, updated) in _buckets.items() if now - updated > BUCKET_IDLE_TTL]:
+        del _buckets[key]
+
+
+def allow(*keys):
+    """Takes one token from each bucket; False if any of them is empty."""
+    global _created
+    now = time.monotonic()
+    with _lock:
+        allowed = all([_take(key, now) for key in keys])
+        if _created >= BUCKET_PRUNE_EVERY:
+            _created = 0
+            _prune(now)
+    return allowed
+
+
+def forget_sid(sid):
+    with _lock:
+        _buckets.pop(('sid', sid), None)
+
+
+def event_keys(sid, per_player=False):
+    """Buckets an event is charged to. The player bucket is the one of the player the
+    socket joined or resumed as, never an id taken from the payload."""
+    keys = [('sid', sid)]
+    player = tracked_player(sid) if per_player else None
+    if player:
+        keys.append(('player', *player))
+    return keys
+
+
+def rate_limited(name, per_player=False):
+    """Drops a socket event when its socket (or player) is over budget.
+    Async handlers (asyncio engine) take the sid as first argument."""
+    def decorator(f):
+        if inspect.iscoroutinefunction(f):
+            @functools.wraps(f)
+            async def async_wrapper(sid, data=None):
+                if not _allow_event(name, sid, per_player):
+                    return
+                return await f(sid, data)
+            return async_wrapper
+
+        @functools.wraps(f)
+        def wrapper(data=None, *args, **kwargs):
+            from flask import request
+            if not _allow_event(name, request.sid, per_player):
+                return
+            return f(data, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _allow_event(name, sid, per_player):
+    if allow(*event_keys(sid, per_player)):
+        return True
+    metrics.inc('socketio_rate_limited_total', event=name)
+    metrics.debug_sampled(logger, "Rate limited %s from %s", name, sid)
+    return False
@@ -0,0 +1,206 @@
+import os
+import json
+import threading
+from keyspace import GAME_TTL
+from sessions import sids_key
+
+# Roster of a game for the host screens (ADMIN / HOST_DISPLAY)
+# Every roster change (join or leave) is RPUSHed onto the game:{pin}:roster log, so the roster
+# version is simply the log length and "changes since version V" is LRANGE V -1.
+#  - A player whose socket dropped and didn't resume within PLAYER_LEAVE_GRACE is logged
+#    as a leave (and as a join again if it resumes later); game:{pin}:left holds them.
+#  - New changes are announced by one task per game (guarded by a Redis SET NX) as a
+#    single 'players_joined' batch per interval to the host room.
+#  - A connecting host gets the whole roster as 'roster_snapshot' chunks, or only
+#    a 'roster_delta' if it sends the version it already has.
+JOIN_ANNOUNCE_INTERVAL = float(os.getenv('JOIN_ANNOUNCE_INTERVAL', 0.5))
+ROSTER_CHUNK_SIZE = int(os.getenv('ROSTER_CHUNK_SIZE', 500))
+ROSTER_DELTA_MAX = int(os.getenv('ROSTER_DELTA_MAX', 1000)) # bigger gaps get a snapshot
+ANNOUNCER_IDLE_TICKS = 10 # stop the task after this many empty intervals
+ANNOUNCER_LOCK_TTL = 60
+PLAYER_LEAVE_GRACE = float(os.getenv('PLAYER_LEAVE_GRACE', 30)) # seconds to resume before leaving
+
+# KEYS: sids, roster log, left, announcer lock
+# ARGV: player_id, sid that dropped, leave entry, ttl, announcer lock ttl
+# Logs the leave unless the player resumed on another socket (or already left).
+# Returns 1 if the caller has to start the announcer.
+LEAVE_LUA = """
+if redis.call('HGET', KEYS[1], ARGV[1]) ~= ARGV[2] or redis.call('SADD', KEYS[3], ARGV[1]) == 0 then
+    return 0
+end
+redis.call('EXPIRE', KEYS[3], ARGV[4])
+redis.call('RPUSH', KEYS[2], ARGV[3])
+if redis.call('SET', KEYS[4], 1, 'NX', 'EX', ARGV[5]) then
+    return 1
+end
+return 0
+"""
+
+# KEYS: left, roster log, announcer lock
+# ARGV: player_id, join entry, announcer lock ttl
+# A player that was logged as gone and resumed joins the roster again.
+RETURN_LUA = """
+if redis.call('SREM', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+redis.call('RPUSH', KEYS[2], ARGV[2])
+if redis.call('SET', KEYS[3], 1, 'NX', 'EX', ARGV[3]) then
+    return 1
+end
+return 0
+"""
+
+# Player sockets served by this worker (a socket's disconnect runs where it lives)
+_lock = threading.Lock()
+_player_sockets = {} # sid -> (pin, player_id)
+
+
+def host_room(pin):
+    # ADMIN and HOST_DISPLAY sockets
+    return f"host_{pin}"
+
+
+def roster_log_key(pin):
+    return f"game:{pin}:roster"
+
+
+def announced_key(pin):
+    # Roster version already sent to the host room
+    return f"game:{pin}:roster_announced"
+
+
+def announcer_key(pin):
+    return f"game:{pin}:join_announcer"
+
+
+def left_key(pin):
+    # Players logged as gone
+    return f"game:{pin}:left"
+
+
+def join_entry(player_id, nickname):
+    return json.dumps({'op': 'join', 'id': player_id, 'nickname': nickname})
+
+
+def track_player(sid, pin, player_id):
+    with _lock:
+        _player_sockets[sid] = (pin, player_id)
+
+
+def tracked_player(sid):
+    """(pin, player_id) a socket of this worker joined or resumed as, or None."""
+    with _lock:
+        return _player_sockets.get(sid)
+
+
+def untrack_player(sid):
+    """(pin, player_id) of a player socket that went away, or None."""
+    with _lock:
+        return _player_sockets.pop(sid, None)
+
+
+def queue_join(pin, player_id, nickname, pipe):
+    """Logs the join. The last command's result tells if we own the announcer."""
+    pipe.rpush(roster_log_key(pin), join_entry(player_id, nickname))
+    pipe.expire(roster_log_key(pin), GAME_TTL)
+    pipe.set(announcer_key(pin), 1, nx=True, ex=ANNOUNCER_LOCK_TTL)
+
+
+def start_announcer(io, pin):
+    io.start_task(_announce_loop, io, pin)
+
+
+def player_disconnected(io, sid):
+    """Log the player as gone if it hasn't resumed after PLAYER_LEAVE_GRACE."""
+    player = untrack_player(sid)
+    if player:
+        io.start_task(_leave_after_grace, io, sid, *player)
+
+
+async def _leave_after_grace(io, sid, pin, player_id):
+    await io.sleep(PLAYER_LEAVE_GRACE)
+    keys = [sids_key(pin), roster_log_key(pin), left_key(pin), announcer_key(pin)]
+    args = [player_id, sid, json.dumps({'op': 'leave', 'id': player_id}), GAME_TTL, ANNOUNCER_LOCK_TTL]
+    if await io.run(io.script(LEAVE_LUA)(keys=keys, args=args)):
+        start_announcer(io, pin)
+
+
+async def player_returned(io, pin, player_id, nickname):
+    """A resumed player that was logged as gone is back in the roster."""
+    keys = [left_key(pin), roster_log_key(pin), announcer_key(pin)]
+    if await io.run(io.script(RETURN_LUA)(keys=keys, args=[player_id, join_entry(player_id, nickname), ANNOUNCER_LOCK_TTL])):
+        start_announcer(io, pin)
+
+
+async def send_roster(io, pin, sid, known_version=None):
+    """Sync a host socket: a delta if it already has a recent version, else a chunked snapshot."""
+    try:
+        known_version = int(known_version) if known_version is not None else None
+    except (TypeError, ValueError):
+        known_version = None
+
+    if known_version is not None:
+        version = await io.run(io.redis.llen(roster_log_key(pin)))
+        if 0 <= version - known_version <= ROSTER_DELTA_MAX:
+            changes = await io.run(io.redis.lrange(roster_log_key(pin), known_version, version - 1)) if version > known_version else []
+            await io.emit('roster_delta', {
+                'from_version': known_version,
+                'version': version,
+                'changes': [json.loads(raw) for raw in changes]
+            }, to=sid)
+            return
+
+    # Version and players read together so the snapshot matches its version
+    pipe = io.redis.pipeline(transaction=True)
+    pipe.llen(roster_log_key(pin))
+    pipe.hgetall(f"game:{pin}:players")
+    pipe.smembers(left_key(pin))
+    version, players, left = await io.run(pipe.execute())
+
+    roster = [{'id': pid, 'nickname': name} for pid, name in players.items() if pid not in left]
+    chunks = [roster[i:i + ROSTER_CHUNK_SIZE] for i in range(0, len(roster), ROSTER_CHUNK_SIZE)] or [[]]
+    for i, chunk in enumerate(chunks):
+        await io.emit('roster_snapshot', {
+            'version': version,
+            'chunk': i,
+            'total_chunks': len(chunks),
+            'players': chunk
+        }, to=sid)
+
+
+async def _announce_loop(io, pin):
+    idle = 0
+    while True:
+        await io.sleep(JOIN_ANNOUNCE_INTERVAL)
+
+        pipe = io.redis.pipeline()
+        pipe.get(announced_key(pin))
+        pipe.llen(roster_log_key(pin))
+        announced, version = await io.run(pipe.execute())
+        announced = int(announced or 0)
+
+        if version > announced:
+            idle = 0
+            changes = await io.run(io.redis.lrange(roster_log_key(pin), announced, version - 1))
+            await io.emit('players_joined', {
+                'version': version,
+                'players': [json.loads(raw) for raw in changes]
+            }, to=host_room(pin))
+            pipe = io.redis.pipeline()
+            pipe.set(announced_key(pin), version, ex=GAME_TTL)
+            pipe.expire(announcer_key(pin), ANNOUNCER_LOCK_TTL)
+            await io.run(pipe.execute())
+            continue
+
+        idle += 1
+        if idle < ANNOUNCER_IDLE_TICKS:
+            continue
+
+        # Release the lock. A join that slipped in meanwhile would find no announcer,
+        # so take the lock back if anything is still unannounced.
+        await io.run(io.redis.delete(announcer_key(pin)))
+        if (await io.run(io.redis.llen(roster_log_key(pin)))) > announced and \
+                await io.run(io.redis.set(announcer_key(pin), 1, nx=True, ex=ANNOUNCER_LOCK_TTL)):
+            idle = 0
+            continue
+        return
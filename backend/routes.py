@@ -1,16 +1,57 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from datetime import datetime
+from sqlalchemy import and_, or_, case, func, update
 from extensions import db, redis_client
 from models import Game, Question
+from cache import warm_questions, invalidate_questions
+from questions import parse_csv, validate_questions, QuestionImportError
+from broadcast import LEADERBOARD_INTERVAL, LEADERBOARD_INTERVAL_MIN, LEADERBOARD_INTERVAL_MAX, LEADERBOARD_MODES, COMPACT_DEFAULT
+from lifecycle import QUESTION_DURATION, QUESTION_DURATION_MIN, QUESTION_DURATION_MAX
+from prefetch import PREFETCH_DEFAULT
+from metrics import render_prometheus
+from connections import health
+from export import export_game, EXPORT_FORMATS, EXPORT_TABLES
+from pinpool import allocate_pin
+from keyspace import GAME_TTL, memory_report
+from pins import resolve_pin, set_status, owns_pin, games_version, bump_games_version
 
 main = Blueprint('main', __name__)
 
+GAMES_PAGE_SIZE = 50
+GAMES_PAGE_MAX = 200
+
+# Question order is the play order: answers store the index of the question they
+# answered (exports map it back through position), so it is frozen once a game starts.
+QUESTIONS_LOCKED_STATUSES = ('ACTIVE', 'FINISHED')
+
 @main.route('/create_game', methods=['POST'])
 def create_game():
     data = request.json or {}
     title = data.get('title', 'Untitled Game')
+    # Leaderboard broadcast settings (see broadcast.py)
+    leaderboard_interval = _bounded_float(data.get('leaderboard_interval', LEADERBOARD_INTERVAL),
+                                          LEADERBOARD_INTERVAL_MIN, LEADERBOARD_INTERVAL_MAX)
+    if leaderboard_interval is None:
+        return jsonify({'error': f'leaderboard_interval must be a number of seconds between '
+                                 f'{LEADERBOARD_INTERVAL_MIN} and {LEADERBOARD_INTERVAL_MAX}'}), 400
+    leaderboard_mode = data.get('leaderboard_mode', 'interval')
+    if leaderboard_mode not in LEADERBOARD_MODES:
+        return jsonify({'error': f'leaderboard_mode must be one of {LEADERBOARD_MODES}'}), 400
+    # Seconds each question stays open before the server closes it (see lifecycle.py)
+    question_duration = _bounded_float(data.get('question_duration', QUESTION_DURATION),
+                                       QUESTION_DURATION_MIN, QUESTION_DURATION_MAX)
+    if question_duration is None:
+        return jsonify({'error': f'question_duration must be a number of seconds between '
+                                 f'{QUESTION_DURATION_MIN} and {QUESTION_DURATION_MAX}'}), 400
+    # Stage each next question on the clients during the results phase (see prefetch.py)
+    prefetch = bool(data.get('prefetch', PREFETCH_DEFAULT))
+    # Delta-encoded leaderboard updates (see broadcast.py)
+    compact = bool(data.get('compact', COMPACT_DEFAULT))
     
-    pin = Game.generate_pin()
+    # Collision-free PIN from the Redis pool (see pinpool.py)
+    pin = allocate_pin() if redis_client else Game.generate_pin()
+    if not pin:
+        return jsonify({'error': 'No free game PIN available, try again'}), 503
     game = Game(pin=pin, title=title, status='PREPARED')
     db.session.add(game)
     db.session.commit()
@@ -19,23 +60,88 @@ def create_game():
     if redis_client:
         redis_client.hset(f"game:{pin}", mapping={
             "pin": pin,
+            "game_id": game.id,
+            "status": 'PREPARED',
             "current_question_index": -1,
-            "is_active": 0 # Not active yet
+            "is_active": 0, # Not active yet
+            "leaderboard_interval": leaderboard_interval,
+            "leaderboard_mode": leaderboard_mode,
+            "question_duration": question_duration,
+            "prefetch": int(prefetch),
+            "compact": int(compact)
         })
-        redis_client.expire(f"game:{pin}", 86400) # 24 hours
+        redis_client.expire(f"game:{pin}", GAME_TTL)
+        bump_games_version()
 
     return jsonify({'pin': pin, 'game_id': game.id, 'title': title, 'status': 'PREPARED'})
 
+def _bounded_float(value, minimum, maximum):
+    """value as a float within [minimum, maximum], or None (not a number, NaN or out of range)."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if minimum <= value <= maximum else None
+
 @main.route('/games', methods=['GET'])
 def list_games():
-    games = Game.query.order_by(Game.created_at.desc()).all()
-    return jsonify([{
-        'id': g.id,
-        'pin': g.pin,
-        'title': g.title,
-        'status': g.status,
-        'created_at': g.created_at.isoformat() if g.created_at else None
-    } for g in games])
+    """
+    Newest games first, one page at a time (keyset pagination on created_at, id).
+    Query args: status, limit (max GAMES_PAGE_MAX), cursor (next_cursor of the previous page).
+    The ETag follows the games version in Redis, so an unchanged listing is a 304 without SQL.
+    """
+    status = request.args.get('status')
+    try:
+        limit = min(max(int(request.args.get('limit', GAMES_PAGE_SIZE)), 1), GAMES_PAGE_MAX)
+        cursor = _decode_cursor(request.args.get('cursor'))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit or cursor'}), 400
+
+    etag = None
+    if redis_client:
+        etag = f"games-{games_version()}-{status}-{limit}-{request.args.get('cursor')}"
+        if etag in request.if_none_match:
+            return Response(status=304, headers={'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'})
+
+    # Served by idx_games_created / idx_games_status_created
+    query = Game.query
+    if status:
+        query = query.filter(Game.status == status)
+    if cursor:
+        created_at, game_id = cursor
+        query = query.filter(or_(
+            Game.created_at < created_at,
+            and_(Game.created_at == created_at, Game.id < game_id)
+        ))
+    games = query.order_by(Game.created_at.desc(), Game.id.desc()).limit(limit + 1).all()
+
+    next_cursor = _encode_cursor(games[limit - 1]) if len(games) > limit else None
+    response = jsonify({
+        'games': [{
+            'id': g.id,
+            'pin': g.pin,
+            'title': g.title,
+            'status': g.status,
+            'created_at': g.created_at.isoformat() if g.created_at else None
+        } for g in games[:limit]],
+        'next_cursor': next_cursor
+    })
+    if etag:
+        response.set_etag(etag)
+    # Always revalidate, a 304 is cheap
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _encode_cursor(game):
+    return f"{game.created_at.isoformat()}_{game.id}"
+
+
+def _decode_cursor(cursor):
+    if not cursor:
+        return None
+    created_at, game_id = cursor.rsplit('_', 1)
+    return datetime.fromisoformat(created_at), int(game_id)
 
 @main.route('/game/<int:game_id>/status', methods=['PUT'])
 def update_game_status(game_id):
@@ -43,33 +149,42 @@ def update_game_status(game_id):
     new_status = data.get('status')
     
     game = Game.query.get_or_404(game_id)
+    old_status = game.status
     game.status = new_status
+    # A finished game's PIN may already serve a newer game: leave its keys alone
+    owned = redis_client and owns_pin(game.pin, game.id)
     
     if new_status == 'ACTIVE':
         # Ensure Redis is ready
-        if redis_client:
+        if owned:
             redis_client.hset(f"game:{game.pin}", "is_active", 1)
+            # PREPARED -> ACTIVE: cache the question set before players start asking for it
+            if old_status != 'ACTIVE':
+                warm_questions(game.pin, game.id)
             
     elif new_status == 'FINISHED':
         game.finished_at = datetime.utcnow()
-        if redis_client:
+        if owned:
             redis_client.hset(f"game:{game.pin}", "is_active", 0)
             
     db.session.commit()
+    # Keep the PIN cache coherent with MySQL
+    set_status(game.pin, game.id, new_status)
     return jsonify({'message': 'Status updated', 'status': new_status})
 
 @main.route('/state/<pin>', methods=['GET'])
 def get_game_state(pin):
-    # Check MySQL first for status
-    game = Game.query.filter_by(pin=pin).first()
+    # Status from the PIN cache, MySQL only for games it doesn't know yet
+    game = resolve_pin(pin)
     if not game:
          return jsonify({'error': 'Game not found'}), 404
          
-    if redis_client and redis_client.exists(f"game:{pin}"):
+    if redis_client:
         state = redis_client.hgetall(f"game:{pin}")
-        return jsonify(state)
+        if state:
+            return jsonify(state)
     
-    return jsonify({'pin': pin, 'status': game.status})
+    return jsonify({'pin': pin, 'status': game['status']})
 
 
 @main.route('/add_question', methods=['POST'])
@@ -80,8 +195,148 @@ def add_question():
     options = data.get('options')
     correct_index = data.get('correct_index')
     
-    question = Question(text=text, options=options, correct_option_index=correct_index, game_id=game_id)
+    question = Question(text=text, options=options, correct_option_index=correct_index, game_id=game_id,
+                        position=_next_position(game_id))
     db.session.add(question)
     db.session.commit()
+
+    # The question set changed, drop the cached copy (re-warmed on next access)
+    if redis_client:
+        game = Game.query.get(game_id)
+        if game and owns_pin(game.pin, game.id):
+            invalidate_questions(game.pin)
     
     return jsonify({'message': 'Question added'})
+
+
+def _next_position(game_id):
+    # MAX(position) of the game, read from idx_questions_game_position
+    last = db.session.query(func.max(Question.position)).filter(Question.game_id == game_id).scalar()
+    return last + 1 if last is not None else 0
+
+
+@main.route('/game/<int:game_id>/questions', methods=['GET'])
+def list_questions(game_id):
+    Game.query.get_or_404(game_id)
+    questions = Question.query.filter_by(game_id=game_id).order_by(Question.position, Question.id).all()
+    return jsonify([{
+        'id': q.id,
+        'text': q.text,
+        'options': q.options,
+        'correct_index': q.correct_option_index,
+        'position': q.position
+    } for q in questions])
+
+
+@main.route('/game/<int:game_id>/questions/import', methods=['POST'])
+def import_questions(game_id):
+    """
+    Bulk import: a JSON array of {text, options, correct_index}, or a CSV upload
+    (multipart field 'file' or a text/csv body, see questions.py). ?replace=1 replaces
+    the current set. Everything is validated first, then written in one transaction.
+    """
+    game = Game.query.get_or_404(game_id)
+    if game.status in QUESTIONS_LOCKED_STATUSES:
+        return jsonify({'error': f'Questions of a {game.status.lower()} game cannot be changed'}), 409
+
+    try:
+        if 'file' in request.files:
+            items = parse_csv(request.files['file'].read().decode('utf-8-sig'))
+        elif request.mimetype == 'text/csv':
+            items = parse_csv(request.get_data(as_text=True))
+        else:
+            items = request.get_json(silent=True)
+        questions = validate_questions(items)
+    except UnicodeDecodeError:
+        return jsonify({'error': 'CSV must be UTF-8'}), 400
+    except QuestionImportError as e:
+        return jsonify({'error': 'Invalid questions', 'details': e.errors}), 400
+
+    replace = request.args.get('replace') == '1'
+    try:
+        if replace:
+            Question.query.filter_by(game_id=game_id).delete(synchronize_session=False)
+        first = 0 if replace else _next_position(game_id)
+        # executemany: one multi-row INSERT for the whole set
+        db.session.execute(Question.__table__.insert(), [{
+            'game_id': game_id,
+            'text': q['text'],
+            'options': q['options'],
+            'correct_option_index': q['correct_index'],
+            'position': first + i
+        } for i, q in enumerate(questions)])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    if redis_client and owns_pin(game.pin, game.id):
+        invalidate_questions(game.pin)
+    return jsonify({'message': 'Questions imported', 'imported': len(questions)}), 201
+
+
+@main.route('/game/<int:game_id>/questions/order', methods=['PUT'])
+def reorder_questions(game_id):
+    """Body: {"order": [question_id, ...]} with every question of the game exactly once."""
+    game = Game.query.get_or_404(game_id)
+    if game.status in QUESTIONS_LOCKED_STATUSES:
+        return jsonify({'error': f'Questions of a {game.status.lower()} game cannot be changed'}), 409
+
+    order = (request.get_json(silent=True) or {}).get('order')
+    current = {qid for (qid,) in db.session.query(Question.id).filter(Question.game_id == game_id)}
+    if not isinstance(order, list) or len(order) != len(current) or set(order) != current:
+        return jsonify({'error': 'order must list every question id of the game exactly once'}), 400
+
+    if order:
+        # One UPDATE ... SET position = CASE id WHEN .. THEN .. END
+        db.session.execute(
+            update(Question)
+            .where(Question.game_id == game_id, Question.id.in_(order))
+            .values(position=case({qid: i for i, qid in enumerate(order)}, value=Question.id))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+    if redis_client and owns_pin(game.pin, game.id):
+        invalidate_questions(game.pin)
+    return jsonify({'message': 'Questions reordered'})
+
+
+@main.route('/game/<int:game_id>/export', methods=['GET'])
+def export_results(game_id):
+    """Streams ?table=players|answers as ?format=csv|ndjson (see export.py)."""
+    game = Game.query.get_or_404(game_id)
+    table = request.args.get('table', 'answers')
+    fmt = request.args.get('format', 'csv')
+    if table not in EXPORT_TABLES or fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f'table must be one of {EXPORT_TABLES}, format one of {tuple(EXPORT_FORMATS)}'}), 400
+
+    # Pending answers/players are still in the write-behind queues until flushed
+    filename = f"game_{game.pin}_{table}.{fmt}"
+    return Response(
+        stream_with_context(export_game(game_id, table, fmt)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+
+@main.route('/metrics', methods=['GET'])
+def get_metrics():
+    # Prometheus text format, per worker process
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+@main.route('/health', methods=['GET'])
+def get_health():
+    # Backend round trips and pool saturation of this worker; 503 if MySQL or Redis is down
+    report, healthy = health()
+    return jsonify(report), 200 if healthy else 503
+
+
+@main.route('/admin/redis_memory', methods=['GET'])
+def get_redis_memory():
+    # Per-game key count and bytes (SCAN + MEMORY USAGE), biggest games first
+    if not redis_client:
+        return jsonify({'error': 'Redis not configured'}), 503
+    top = request.args.get('top', 50, type=int)
+    return jsonify(memory_report(top))
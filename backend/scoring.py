@@ -0,0 +1,160 @@
+import os
+import logging
+import time
+from leaderboard import scores_key, players_key
+from sessions import sids_key
+from broadcast import dirty_key, counts_key, counts_dirty_key
+from writers import ANSWER_QUEUE_KEY, ANSWER_QUEUE_MAX
+
+logger = logging.getLogger(__name__)
+
+# Scoring tiers as "max_seconds:points" pairs, fastest first.
+# Correct answers slower than the last tier get 0 points.
+SCORING_TIERS = [
+    tuple(float(part) for part in tier.split(':'))
+    for tier in os.getenv('SCORING_TIERS', '2:150,5:100,10:50').split(',')
+]
+
+# Validate -> record -> score -> rank -> enqueue for MySQL in one server-side script
+# (one round trip per answer).
+# The per-question keys are built from the index the client answers (read from
+# game:{pin} first if it didn't send one) so every key is declared in KEYS; the
+# script checks that index against current_question_index, so next_question can't
+# move the index between our reads.
+#
+# KEYS[1] game:{pin}
+# KEYS[2] game:{pin}:correct_answers
+# KEYS[3] game:{pin}:scores
+# KEYS[4] game:{pin}:leaderboard_dirty
+# KEYS[5] write-behind answer queue (see writers.py)
+# KEYS[6] game:{pin}:counts_dirty
+# KEYS[7] game:{pin}:players
+# KEYS[8] game:{pin}:sids (player_id -> sid of the player's socket, see sessions.py)
+# KEYS[9] game:{pin}:answers:{index}
+# KEYS[10] game:{pin}:counts:{index} (per-option counts, see broadcast.py)
+# ARGV[1] player_id
+# ARGV[2] answer_index
+# ARGV[3] question index answered
+# ARGV[4] server time (seconds)
+# ARGV[5] pin
+# ARGV[6] max answer queue length
+# ARGV[7] sid of the submitting socket
+# ARGV[8..] max_seconds, points, max_seconds, points, ...
+#
+# Returns {status, current_index, is_correct, points, score, rank, queued}
+# status: 'ok', 'late' (index mismatch), 'closed' (past the deadline), 'duplicate'
+# (the player already answered this question, first answer wins), 'unknown_player'
+# (not a player of this game, or not the socket the player joined/resumed with) or 'no_game'.
+# rank is 0-based, -1 if unknown.
+# queued is 0 when the answer queue is full (the answer is still kept in the answers hash).
+SUBMIT_ANSWER_LUA = """
+local current, is_open, deadline, start, game_id = unpack(redis.call('HMGET', KEYS[1],
+    'current_question_index', 'question_open', 'question_deadline', 'question_start_time', 'game_id'))
+if not current then
+    return {'no_game'}
+end
+-- Only a registered player, from its own socket, can score (never trust the payload id)
+if redis.call('HEXISTS', KEYS[7], ARGV[1]) == 0 or redis.call('HGET', KEYS[8], ARGV[1]) ~= ARGV[7] then
+    return {'unknown_player', current}
+end
+if tonumber(ARGV[3]) ~= tonumber(current) then
+    return {'late', current}
+end
+local now = tonumber(ARGV[4])
+if is_open == '0' or (deadline and now > tonumber(deadline)) then
+    return {'closed', current}
+end
+
+if redis.call('HSETNX', KEYS[9], ARGV[1], ARGV[2]) == 0 then
+    return {'duplicate', current}
+end
+redis.call('HINCRBY', KEYS[10], ARGV[2], 1)
+redis.call('SET', KEYS[6], 1, 'EX', 3600)
+
+local correct = redis.call('HGET', KEYS[2], current)
+local is_correct = 0
+local points = 0
+if correct and tonumber(correct) == tonumber(ARGV[2]) then
+    is_correct = 1
+    local elapsed = now - (tonumber(start) or now)
+    for i = 8, #ARGV, 2 do
+        if elapsed <= tonumber(ARGV[i]) then
+            points = tonumber(ARGV[i + 1])
+            break
+        end
+    end
+end
+
+local score
+if points > 0 then
+    score = redis.call('ZINCRBY', KEYS[3], points, ARGV[1])
+    redis.call('SET', KEYS[4], 1, 'EX', 3600)
+else
+    score = redis.call('ZSCORE', KEYS[3], ARGV[1])
+end
+local rank = redis.call('ZREVRANK', KEYS[3], ARGV[1])
+
+local queued = 0
+if redis.call('LLEN', KEYS[5]) < tonumber(ARGV[6]) then
+    redis.call('RPUSH', KEYS[5], cjson.encode({
+        game_id = tonumber(game_id),
+        pin = ARGV[5],
+        player_id = tonumber(ARGV[1]),
+        question_index = tonumber(current),
+        option_index = tonumber(ARGV[2]),
+        is_correct = is_correct,
+        answered_at = tonumber(ARGV[4])
+    }))
+    queued = 1
+end
+
+return {'ok', current, is_correct, points, score or '0', rank or -1, queued}
+"""
+
+async def submit_answer(io, pin, player_id, answer_index, client_q_index=None, sid=None, tiers=None):
+    """
+    Runs the atomic submit script. Returns a dict with
+    status, current_index, correct, points_added, score, rank (1-based or None).
+    """
+    tier_args = []
+    for max_seconds, points in (tiers or SCORING_TIERS):
+        tier_args.extend([max_seconds, int(points)])
+
+    if client_q_index is None:
+        current = await io.run(io.redis.hget(f"game:{pin}", "current_question_index"))
+        if current is None:
+            return {'status': 'no_game', 'current_index': None}
+        client_q_index = int(current)
+
+    keys = [f"game:{pin}", f"game:{pin}:correct_answers", scores_key(pin), dirty_key(pin), ANSWER_QUEUE_KEY,
+            counts_dirty_key(pin), players_key(pin), sids_key(pin), f"game:{pin}:answers:{client_q_index}",
+            counts_key(pin, client_q_index)]
+    args = [
+        str(player_id),
+        int(answer_index),
+        int(client_q_index),
+        time.time(),
+        pin,
+        ANSWER_QUEUE_MAX,
+        sid or '',
+        *tier_args
+    ]
+    return parse_submit_result(await io.run(io.script(SUBMIT_ANSWER_LUA)(keys=keys, args=args)), pin, player_id)
+
+
+def parse_submit_result(result, pin, player_id):
+    status = result[0]
+    if status != 'ok':
+        return {'status': status, 'current_index': int(result[1]) if len(result) > 1 else None}
+
+    rank = int(result[5])
+    if not int(result[6]):
+        logger.warning("Answer queue full, answer of player %s in game %s not queued for MySQL", player_id, pin)
+    return {
+        'status': status,
+        'current_index': int(result[1]),
+        'correct': bool(result[2]),
+        'points_added': int(result[3]),
+        'score': int(float(result[4])),
+        'rank': rank + 1 if rank >= 0 else None
+    }
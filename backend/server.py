@@ -0,0 +1,69 @@
+"""
+Production entry point: N eventlet worker processes sharing one port.
+
+    WORKERS=4 PORT=5000 SOCKETIO_MESSAGE_QUEUE=redis://localhost:6379/0 python server.py
+
+Each worker binds the port with SO_REUSEPORT and the kernel spreads new connections
+across them. Socket.IO polling needs sticky sessions, so clients must use the
+websocket transport (frontend/src/services/socket.js already forces it). Room emits
+cross workers through the Redis message queue; all game state lives in Redis, so any
+worker can serve any event.
+"""
+import os
+import sys
+import signal
+import multiprocessing
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HOST = os.getenv('HOST', '0.0.0.0')
+PORT = int(os.getenv('PORT', 5000))
+WORKERS = int(os.getenv('WORKERS', multiprocessing.cpu_count()))
+
+
+def run_worker(index):
+    # Monkey patch before anything imports socket/threading
+    import eventlet
+    eventlet.monkey_patch()
+    from eventlet import wsgi
+    from app import create_app, start_background_workers
+
+    app = create_app()
+    # Background jobs coordinate through Redis (atomic pops and SET NX locks),
+    # so running them in every worker is safe
+    start_background_workers(app)
+
+    sock = eventlet.listen((HOST, PORT), reuse_port=True)
+    print(f"Worker {index} (pid {os.getpid()}) listening on {HOST}:{PORT}")
+    wsgi.server(sock, app, log_output=False)
+
+
+def main():
+    if WORKERS > 1 and not os.getenv('SOCKETIO_MESSAGE_QUEUE'):
+        print("SOCKETIO_MESSAGE_QUEUE is required with WORKERS > 1 (e.g. redis://localhost:6379/0)")
+        sys.exit(1)
+
+    if WORKERS == 1:
+        run_worker(0)
+        return
+
+    ctx = multiprocessing.get_context('spawn')
+    workers = [ctx.Process(target=run_worker, args=(i,), daemon=True) for i in range(WORKERS)]
+    for worker in workers:
+        worker.start()
+
+    def shutdown(signum, frame):
+        for worker in workers:
+            worker.terminate()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+import json
+import secrets
+from leaderboard import scores_key, players_key
+from cache import questions_key
+from finalize import finalized_key
+from keyspace import GAME_TTL
+
+# Player sessions (reconnect without a new player)
+# joined_success carries a resume token "<player_id>.<secret>". After a drop the client
+# sends resume_game with it and gets back the same player id, score and the current
+# question from one script call: no new Kahoo_players row, no second leaderboard entry.
+#
+# game:{pin}:sessions  HASH player_id -> secret
+# game:{pin}:sids      HASH player_id -> sid of the player's latest socket
+SESSION_TTL = GAME_TTL # same as game:{pin}
+
+# KEYS: sessions, sids, game, scores, players, questions, finalized
+# ARGV: player_id, secret, new sid
+# Whether the player already answered the current question is read afterwards, from
+# the answers key of the index this returns (scripts only touch keys passed in KEYS).
+RESUME_LUA = """
+if redis.call('HGET', KEYS[1], ARGV[1]) ~= ARGV[2] then
+    return false
+end
+local old_sid = redis.call('HGET', KEYS[2], ARGV[1])
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[3])
+
+local current = redis.call('HGET', KEYS[3], 'current_question_index')
+local question = false
+if current and tonumber(current) >= 0 then
+    question = redis.call('LINDEX', KEYS[6], current)
+end
+return {
+    redis.call('HGET', KEYS[5], ARGV[1]),
+    redis.call('ZSCORE', KEYS[4], ARGV[1]),
+    redis.call('ZREVRANK', KEYS[4], ARGV[1]),
+    current,
+    question,
+    redis.call('EXISTS', KEYS[7]),
+    old_sid
+}
+"""
+
+
+def sessions_key(pin):
+    return f"game:{pin}:sessions"
+
+
+def sids_key(pin):
+    return f"game:{pin}:sids"
+
+
+def create_session(pin, player_id, sid, pipe):
+    """Queue the session writes on the join pipeline. Returns the resume token."""
+    secret = secrets.token_urlsafe(16)
+    pipe.hset(sessions_key(pin), player_id, secret)
+    pipe.hset(sids_key(pin), player_id, sid)
+    pipe.expire(sessions_key(pin), SESSION_TTL)
+    pipe.expire(sids_key(pin), SESSION_TTL)
+    return f"{player_id}.{secret}"
+
+
+async def resume_session(io, pin, token, sid):
+    """
+    Validates a resume token and maps the player to `sid`. Returns None if the token is
+    unknown, else {'player_id', 'nickname', 'score', 'rank', 'current_index', 'question',
+    'answered', 'finished'} (question is the cached dict of the current question or None).
+    """
+    try:
+        player_id, secret = str(token).split('.', 1)
+        player_id = int(player_id)
+    except ValueError:
+        return None
+
+    keys = [sessions_key(pin), sids_key(pin), f"game:{pin}", scores_key(pin), players_key(pin),
+            questions_key(pin), finalized_key(pin)]
+    result = await io.run(io.script(RESUME_LUA)(keys=keys, args=[player_id, secret, sid]))
+    if not result:
+        return None
+    nickname, score, rank, current, question, finished, old_sid = result
+    answered = None
+    if question:
+        answered = await io.run(io.redis.hget(f"game:{pin}:answers:{current}", player_id))
+
+    # The dropped socket may still be open somewhere (half-open TCP): close it so it
+    # doesn't keep receiving room messages for this player
+    if old_sid and old_sid != sid:
+        try:
+            await io.disconnect(old_sid)
+        except Exception:
+            pass
+    return {
+        'player_id': player_id,
+        'nickname': nickname,
+        'score': int(float(score)) if score is not None else 0,
+        'rank': rank + 1 if rank is not None else None,
+        'current_index': int(current) if current is not None else None,
+        'question': json.loads(question) if question else None,
+        'answered': answered is not None,
+        'finished': bool(finished)
+    }
@@ -0,0 +1,37 @@
+import os
+import sys
+import asyncio
+
+# Backend modules are imported flat (python app.py from backend/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from ratelimit import rate_limited, forget_sid, SOCKET_BURST
+from roster import track_player, untrack_player
+
+ATTACKERS = ('attacker-1', 'attacker-2', 'attacker-3')
+
+
+def test_forged_player_id_does_not_drain_the_victim_bucket():
+    handled = []
+
+    @rate_limited('submit_answer', per_player=True)
+    async def submit_answer(sid, data=None):
+        handled.append(sid)
+
+    async def scenario():
+        forged = {'pin': '123456', 'player_id': 7, 'answer_index': 0}
+        for attacker in ATTACKERS:
+            for _ in range(int(SOCKET_BURST)):
+                await submit_answer(attacker, forged)
+        await submit_answer('victim-sid', forged)
+
+    track_player('victim-sid', '123456', 7)
+    try:
+        asyncio.run(scenario())
+    finally:
+        untrack_player('victim-sid')
+        for sid in ATTACKERS + ('victim-sid',):
+            forget_sid(sid)
+
+    assert handled[-1] == 'victim-sid'
@@ -0,0 +1,36 @@
+import os
+import sys
+import pytest
+
+# Backend modules are imported flat (python app.py from backend/)
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('POOL_WARMUP', '0')
+
+GAME_EVENTS = {'join_game', 'resume_game', 'start_game', 'next_question', 'leaderboard_sync',
+               'submit_answer', 'disconnect'}
+
+
+def _forget_backend_modules():
+    # Settings are read at import time: re-import with the environment of the case
+    for name, module in list(sys.modules.items()):
+        if os.path.dirname(os.path.abspath(getattr(module, '__file__', None) or '/')) == BACKEND_DIR:
+            del sys.modules[name]
+
+
+@pytest.mark.parametrize('message_queue', [None, 'redis://localhost:6379/0'])
+def test_handlers_registered_after_create_app(monkeypatch, message_queue):
+    if message_queue:
+        monkeypatch.setenv('SOCKETIO_MESSAGE_QUEUE', message_queue)
+    else:
+        monkeypatch.delenv('SOCKETIO_MESSAGE_QUEUE', raising=False)
+    _forget_backend_modules()
+
+    from app import create_app
+    from extensions import socketio
+
+    create_app()
+
+    registered = set(socketio.server.handlers.get('/', {}))
+    assert GAME_EVENTS <= registered
@@ -4,6 +4,13 @@ from sqlalchemy import text
 
 app = create_app()
 
+# Indexes added after the first release: (name, columns)
+GAME_INDEXES = [
+    ('idx_games_pin', 'pin'),
+    ('idx_games_created', 'created_at, id'),
+    ('idx_games_status_created', 'status, created_at, id'),
+]
+
 with app.app_context():
     print("Updating database schema...")
     try:
@@ -17,5 +24,36 @@ with app.app_context():
                 conn.execute(text("ALTER TABLE Kahoo_games ADD COLUMN status VARCHAR(20) DEFAULT 'PREPARED'"))
                 conn.commit()
                 print("Column 'status' added successfully.")
+
+            for name, columns in GAME_INDEXES:
+                result = conn.execute(text("SHOW INDEX FROM Kahoo_games WHERE Key_name = :name"), {'name': name})
+                if result.fetchone():
+                    print(f"Index '{name}' already exists.")
+                else:
+                    print(f"Adding index '{name}'...")
+                    conn.execute(text(f"ALTER TABLE Kahoo_games ADD INDEX {name} ({columns})"))
+                    conn.commit()
+                    print(f"Index '{name}' added successfully.")
+
+            # PINs are recycled from a pool once a finished game expires (pinpool.py),
+            # so they are only unique among live games
+            result = conn.execute(text("SHOW INDEX FROM Kahoo_games WHERE Key_name = 'pin' AND Non_unique = 0"))
+            if result.fetchone():
+                print("Dropping UNIQUE index on 'pin'...")
+                conn.execute(text("ALTER TABLE Kahoo_games DROP INDEX pin"))
+                conn.commit()
+                print("UNIQUE index on 'pin' dropped.")
+
+            result = conn.execute(text("SHOW COLUMNS FROM Kahoo_questions LIKE 'position'"))
+            if result.fetchone():
+                print("Column 'position' already exists.")
+            else:
+                print("Adding column 'position'...")
+                conn.execute(text("ALTER TABLE Kahoo_questions ADD COLUMN position INT NOT NULL DEFAULT 0"))
+                # Keep the order existing games were played in (insertion order)
+                conn.execute(text("UPDATE Kahoo_questions SET position = id"))
+                conn.execute(text("ALTER TABLE Kahoo_questions ADD INDEX idx_questions_game_position (game_id, position)"))
+                conn.commit()
+                print("Column 'position' added successfully.")
     except Exception as e:
         print(f"Error updating schema: {e}")
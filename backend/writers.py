@@ -0,0 +1,202 @@
+import os
+import logging
+import json
+import time
+from datetime import datetime
+from sqlalchemy import func, exc
+from extensions import db, socketio, redis_client
+from models import Player, Answer
+from pins import resolve_pin
+
+logger = logging.getLogger(__name__)
+
+# Write-behind persistence into MySQL
+# Socket handlers RPUSH one JSON record per row onto a Redis list and return.
+# A background writer pops batches (by count or age) and bulk-inserts them with
+# a single executemany, so the hot path never waits on MySQL.
+#
+# queue:players -> Kahoo_players (ids are pre-allocated from a Redis counter at join)
+# queue:answers -> Kahoo_answers (filled by the submit_answer script)
+# Players are always flushed before answers because of the answers -> players FK.
+PLAYER_QUEUE_KEY = "queue:players"
+PLAYER_ID_SEQ_KEY = "seq:player_id"
+ANSWER_QUEUE_KEY = "queue:answers"
+ANSWER_QUEUE_MAX = int(os.getenv('ANSWER_QUEUE_MAX', 200000))
+WRITER_BATCH_SIZE = int(os.getenv('WRITER_BATCH_SIZE', 500))
+WRITER_FLUSH_INTERVAL = float(os.getenv('WRITER_FLUSH_INTERVAL', 1.0)) # max age of a queued row
+WRITER_MAX_RETRIES = int(os.getenv('WRITER_MAX_RETRIES', 5))
+# Errors of the database itself (down, lost connection, deadlock, pool timeout): worth a retry.
+# Anything else (IntegrityError, DataError, malformed record...) is a bad row.
+TRANSIENT_ERRORS = (exc.OperationalError, exc.InterfaceError, exc.DisconnectionError, exc.TimeoutError)
+
+# Raise the player id counter to MAX(id) of Kahoo_players if it is behind
+# (first start, or Redis lost its data), never lower it.
+SEED_SEQ_LUA = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if current < tonumber(ARGV[1]) then
+    redis.call('SET', KEYS[1], ARGV[1])
+    return tonumber(ARGV[1])
+end
+return current
+"""
+
+
+def failed_key(queue_key):
+    # Batches that kept failing, kept for manual replay
+    return f"{queue_key}:failed"
+
+
+def seed_player_ids():
+    max_id = db.session.query(func.max(Player.id)).scalar() or 0
+    return redis_client.eval(SEED_SEQ_LUA, 1, PLAYER_ID_SEQ_KEY, max_id)
+
+
+def enqueue_player(player_id, game_id, name, pipe=None):
+    (pipe if pipe is not None else redis_client).rpush(PLAYER_QUEUE_KEY, json.dumps({
+        'id': player_id,
+        'game_id': game_id,
+        'name': name,
+        'created_at': time.time() # epoch seconds, read back with utcfromtimestamp
+    }))
+
+
+def _pop_batch(queue_key, size):
+    # LRANGE + LTRIM in MULTI/EXEC so two writers never take the same records
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.lrange(queue_key, 0, size - 1)
+    pipe.ltrim(queue_key, size, -1)
+    batch, _ = pipe.execute()
+    return batch
+
+
+def _player_rows(records):
+    return Player.__table__, [{
+        'id': r['id'],
+        'game_id': r['game_id'],
+        'name': r['name'],
+        'final_score': 0,
+        'created_at': datetime.utcfromtimestamp(r['created_at'])
+    } for r in records]
+
+
+def _answer_rows(records):
+    # Records carry the game_id of the game that was live when the answer was scored,
+    # so a PIN reused by a newer game can't claim them. Records queued before that
+    # only have the pin, resolved from the PIN cache.
+    game_ids = {}
+    for pin in {r['pin'] for r in records if r.get('game_id') is None}:
+        game = resolve_pin(pin)
+        if game:
+            game_ids[pin] = game['game_id']
+
+    return Answer.__table__, [{
+        'game_id': r.get('game_id') or game_ids[r['pin']],
+        'player_id': r['player_id'],
+        'question_index': r['question_index'],
+        'option_index': r['option_index'],
+        'is_correct': bool(r['is_correct']),
+        'answered_at': datetime.utcfromtimestamp(r['answered_at'])
+    } for r in records if r.get('game_id') is not None or r['pin'] in game_ids]
+
+
+def _insert(build_rows, raws):
+    table, rows = build_rows([json.loads(raw) for raw in raws])
+    if rows:
+        # executemany: one multi-row INSERT for the whole batch
+        db.session.execute(table.insert(), rows)
+        db.session.commit()
+    return len(rows)
+
+
+def _insert_one_by_one(build_rows, batch):
+    """
+    Fallback for a batch with bad records. Returns (rows inserted, records rejected,
+    records left untried because the database itself failed).
+    """
+    inserted, bad = 0, []
+    for i, raw in enumerate(batch):
+        try:
+            inserted += _insert(build_rows, [raw])
+        except TRANSIENT_ERRORS:
+            db.session.rollback()
+            return inserted, bad, batch[i:]
+        except Exception:
+            db.session.rollback()
+            bad.append(raw)
+    return inserted, bad, []
+
+
+def _flush(queue_key, build_rows):
+    """
+    Drain a queue in batches of WRITER_BATCH_SIZE. Returns the number of rows inserted.
+    When a bulk insert is rejected (constraint, bad data) the batch is retried row by
+    row and the rejected records are moved to the :failed list right away. When the
+    database itself fails (TRANSIENT_ERRORS) the rows go back to the queue with a
+    backoff, and after WRITER_MAX_RETRIES consecutive failures they are parked in
+    :failed as well.
+    """
+    inserted = 0
+    failures = 0
+    while True:
+        batch = _pop_batch(queue_key, WRITER_BATCH_SIZE)
+        if not batch:
+            break
+        try:
+            inserted += _insert(build_rows, batch)
+            failures = 0
+            continue
+        except TRANSIENT_ERRORS as e:
+            db.session.rollback()
+            pending = batch
+            logger.warning("Bulk insert of %s rows of %s failed: %s", len(batch), queue_key, e)
+        except Exception as e:
+            db.session.rollback()
+            logger.warning("Bulk insert of %s rows of %s rejected, retrying row by row: %s", len(batch), queue_key, e)
+            rows, bad, pending = _insert_one_by_one(build_rows, batch)
+            inserted += rows
+            if bad:
+                logger.error("%s records of %s rejected by MySQL, moved to %s", len(bad), queue_key, failed_key(queue_key))
+                redis_client.rpush(failed_key(queue_key), *bad)
+            if not pending:
+                failures = 0
+                continue
+
+        failures += 1
+        logger.error("Error flushing %s rows of %s to MySQL (attempt %s)", len(pending), queue_key, failures)
+        if failures >= WRITER_MAX_RETRIES:
+            redis_client.rpush(failed_key(queue_key), *pending)
+            failures = 0
+            continue
+        # Put it back at the head and back off before retrying
+        redis_client.lpush(queue_key, *reversed(pending))
+        socketio.sleep(min(2 ** failures, 30))
+    return inserted
+
+
+def flush_players():
+    return _flush(PLAYER_QUEUE_KEY, _player_rows)
+
+
+def flush_answers():
+    # Answers reference players, so pending players go first
+    flush_players()
+    return _flush(ANSWER_QUEUE_KEY, _answer_rows)
+
+
+def start_writers(app):
+    with app.app_context():
+        seed_player_ids()
+    socketio.start_background_task(_writer_loop, app)
+
+
+def _writer_loop(app):
+    with app.app_context():
+        while True:
+            socketio.sleep(WRITER_FLUSH_INTERVAL)
+            try:
+                # Batches are capped at WRITER_BATCH_SIZE rows and no row waits more than one interval
+                flush_answers()
+            except Exception as e:
+                logger.exception("Write-behind writer error: %s", e)
+            finally:
+                db.session.remove()
@@ -1,4 +1,4 @@
-import React, { createContext, useState, useEffect } from 'react';
+import React, { createContext, useState, useEffect, useRef } from 'react';
 import { socket } from '../services/socket';
 
 export const GameContext = createContext();
@@ -12,6 +12,7 @@ export const GameProvider = ({ children }) => {
             playerId: null,
             nickname: '',
             pin: null,
+            resumeToken: null,
             currentQuestion: null,
             score: 0,
             isGameStarted: false,
@@ -19,12 +20,41 @@ export const GameProvider = ({ children }) => {
         };
     });
 
+    // Next question staged by the server during the results phase (prefetch mode)
+    const prefetchedQuestion = useRef(null);
+
     useEffect(() => {
         console.log("GameContext State Updated:", gameState);
         localStorage.setItem('gameState', JSON.stringify(gameState));
     }, [gameState]);
 
+    // Latest session, read by the reconnect handlers registered once below
+    const session = useRef(gameState);
+    session.current = gameState;
+
     useEffect(() => {
+        // Back on the same player after a drop (or a page reload) instead of joining again
+        const resumeGame = () => {
+            const { pin, resumeToken, isGameOver } = session.current;
+            if (pin && resumeToken && !isGameOver) {
+                socket.emit('resume_game', { pin, resume_token: resumeToken });
+            }
+        };
+
+        socket.io.on('reconnect', resumeGame);
+        if (!socket.connected && session.current.resumeToken && !session.current.isGameOver) {
+            socket.once('connect', resumeGame);
+            socket.connect();
+        }
+
+        socket.on('resumed', (data) => {
+            setGameState(prev => ({ ...prev, playerId: data.player_id, score: data.score }));
+        });
+
+        socket.on('resume_failed', () => {
+            setGameState(prev => ({ ...prev, resumeToken: null }));
+        });
+
         socket.on('connect', () => {
             setGameState(prev => ({ ...prev, isConnected: true }));
         });
@@ -45,6 +75,19 @@ export const GameProvider = ({ children }) => {
             setGameState(prev => ({ ...prev, currentQuestion: question }));
         });
 
+        socket.on('prefetch_question', (question) => {
+            prefetchedQuestion.current = question;
+        });
+
+        // Prefetch mode: the question is already here, show it at the common start time
+        socket.on('reveal_question', (data) => {
+            const question = prefetchedQuestion.current;
+            if (!question || question.index !== data.index) return;
+            setTimeout(() => {
+                setGameState(prev => ({ ...prev, currentQuestion: { ...question, duration: data.duration } }));
+            }, data.start_in * 1000);
+        });
+
         socket.on('answer_result', (data) => {
             setGameState(prev => ({ ...prev, score: data.score }));
         });
@@ -54,11 +97,16 @@ export const GameProvider = ({ children }) => {
         });
 
         return () => {
+            socket.io.off('reconnect', resumeGame);
+            socket.off('resumed');
+            socket.off('resume_failed');
             socket.off('connect');
             socket.off('disconnect');
             socket.off('player_joined');
             socket.off('game_started');
             socket.off('new_question');
+            socket.off('prefetch_question');
+            socket.off('reveal_question');
             socket.off('game_over');
         };
     }, []);
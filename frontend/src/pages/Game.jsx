@@ -37,17 +37,20 @@ const Game = () => {
             setIsCorrect(data.correct);
         };
 
-        const handleNewQuestion = () => {
-            setHasAnswered(false);
+        // A resumed player gets the current question back with answered: true if it already answered
+        const handleNewQuestion = (q) => {
+            setHasAnswered(Boolean(q && q.answered));
             setIsCorrect(null);
         };
 
         socket.on('answer_result', handleAnswerResult);
         socket.on('new_question', handleNewQuestion);
+        socket.on('reveal_question', handleNewQuestion);
 
         return () => {
             socket.off('answer_result', handleAnswerResult);
             socket.off('new_question', handleNewQuestion);
+            socket.off('reveal_question', handleNewQuestion);
         };
     }, [socket]);
 
@@ -41,6 +41,7 @@ const Home = () => {
                 ...prev,
                 gameId: data.game_id,
                 playerId: data.player_id,
+                resumeToken: data.resume_token,
                 nickname: nickname,
                 pin: currentPin,
                 isGameOver: false,
@@ -4,6 +4,7 @@ import { useNavigate } from 'react-router-dom';
 const AdminDashboard = () => {
     const navigate = useNavigate();
     const [games, setGames] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
     const [newGameTitle, setNewGameTitle] = useState('');
     const [loading, setLoading] = useState(false);
 
@@ -11,11 +12,14 @@ const AdminDashboard = () => {
         fetchGames();
     }, []);
 
-    const fetchGames = async () => {
+    // The listing is paginated (newest first); refreshes are revalidated with the ETag
+    const fetchGames = async (cursor = null) => {
         try {
-            const res = await fetch('http://localhost:5000/api/games');
+            const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+            const res = await fetch(`http://localhost:5000/api/games${query}`);
             const data = await res.json();
-            setGames(data);
+            setGames(prev => cursor ? [...prev, ...data.games] : data.games);
+            setNextCursor(data.next_cursor);
         } catch (error) {
             console.error("Error fetching games:", error);
         }
@@ -151,6 +155,15 @@ const AdminDashboard = () => {
                                     </div>
                                 </div>
                             ))}
+
+                            {nextCursor && (
+                                <button
+                                    onClick={() => fetchGames(nextCursor)}
+                                    className="w-full text-xs font-medium bg-slate-800 hover:bg-slate-700 text-slate-300 border border-slate-700 py-2 rounded-lg transition-colors"
+                                >
+                                    Cargar más
+                                </button>
+                            )}
                         </div>
                     </div>
                 </div>
@@ -1,6 +1,8 @@
-import React, { useState, useContext, useEffect } from 'react';
+import React, { useState, useContext, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { GameContext } from '../../context/GameContext';
+import { applyRosterChanges } from '../../services/roster';
+import { emptyLeaderboard, applyLeaderboardSnapshot, applyLeaderboardDelta, leaderboardList } from '../../services/leaderboard';
 
 const HostControl = () => {
     const { pin } = useParams();
@@ -8,6 +10,9 @@ const HostControl = () => {
     const { socket } = useContext(GameContext);
 
     const [players, setPlayers] = useState([]);
+    const rosterVersion = useRef(null);
+    const prefetchedQuestion = useRef(null);
+    const leaderboardState = useRef(emptyLeaderboard);
     const [currentQuestion, setCurrentQuestion] = useState(null);
     const [leaderboard, setLeaderboard] = useState([]);
     const [gameStatus, setGameStatus] = useState('LOBBY'); // LOBBY, QUESTION, LEADERBOARD, END
@@ -15,12 +20,31 @@ const HostControl = () => {
     useEffect(() => {
         if (!socket) return;
 
-        socket.connect();
-        socket.emit('join_game', { pin, nickname: 'ADMIN' });
+        // (Re)join on every connect, sending the roster version we already have
+        // so the server only sends what changed since then
+        const joinAsHost = () => {
+            socket.emit('join_game', { pin, nickname: 'ADMIN', roster_version: rosterVersion.current });
+            socket.emit('leaderboard_sync', { pin });
+        };
+
+        const handleRosterSnapshot = (data) => {
+            setPlayers(prev => applyRosterChanges(data.chunk === 0 ? [] : prev, data.players));
+            if (data.chunk === data.total_chunks - 1) {
+                rosterVersion.current = data.version;
+            }
+        };
 
-        const handlePlayerJoined = (data) => {
-            if (data.nickname !== 'ADMIN') {
-                setPlayers(prev => [...prev, data.nickname]);
+        const handleRosterDelta = (data) => {
+            setPlayers(prev => applyRosterChanges(prev, data.changes));
+            rosterVersion.current = data.version;
+        };
+
+        const handlePlayersJoined = (data) => {
+            setPlayers(prev => applyRosterChanges(prev, data.players));
+            // Only advance the version if this batch continues the one we have (no gap)
+            const fromVersion = data.version - data.players.length;
+            if (rosterVersion.current !== null && fromVersion <= rosterVersion.current) {
+                rosterVersion.current = Math.max(rosterVersion.current, data.version);
             }
         };
 
@@ -29,25 +53,71 @@ const HostControl = () => {
             setGameStatus('QUESTION');
         };
 
+        const handlePrefetchQuestion = (q) => {
+            prefetchedQuestion.current = q;
+        };
+
+        const handleRevealQuestion = (data) => {
+            const q = prefetchedQuestion.current;
+            if (!q || q.index !== data.index) return;
+            setTimeout(() => handleNewQuestion({ ...q, duration: data.duration }), data.start_in * 1000);
+        };
+
         const handleLeaderboard = (data) => {
             setLeaderboard(data);
             // If we receive leaderboard, it usually means a question ended or game over
             // But let's rely on explicit state or just show it.
         };
 
+        // Compact mode: apply only the changed entries, resync on a version gap
+        const handleLeaderboardSnapshot = (data) => {
+            leaderboardState.current = applyLeaderboardSnapshot(data);
+            setLeaderboard(leaderboardList(leaderboardState.current));
+        };
+
+        const handleLeaderboardDelta = (data) => {
+            const next = applyLeaderboardDelta(leaderboardState.current, data);
+            if (!next) {
+                socket.emit('leaderboard_sync', { pin });
+                return;
+            }
+            leaderboardState.current = next;
+            setLeaderboard(leaderboardList(next));
+        };
+
         const handleGameOver = () => {
             setGameStatus('END');
         };
 
-        socket.on('player_joined', handlePlayerJoined);
+        socket.on('connect', joinAsHost);
+        socket.on('roster_snapshot', handleRosterSnapshot);
+        socket.on('roster_delta', handleRosterDelta);
+        socket.on('players_joined', handlePlayersJoined);
         socket.on('new_question', handleNewQuestion);
+        socket.on('prefetch_question', handlePrefetchQuestion);
+        socket.on('reveal_question', handleRevealQuestion);
         socket.on('update_leaderboard', handleLeaderboard);
+        socket.on('leaderboard_snapshot', handleLeaderboardSnapshot);
+        socket.on('leaderboard_delta', handleLeaderboardDelta);
         socket.on('game_over', handleGameOver);
 
+        if (socket.connected) {
+            joinAsHost();
+        } else {
+            socket.connect();
+        }
+
         return () => {
-            socket.off('player_joined', handlePlayerJoined);
+            socket.off('connect', joinAsHost);
+            socket.off('roster_snapshot', handleRosterSnapshot);
+            socket.off('roster_delta', handleRosterDelta);
+            socket.off('players_joined', handlePlayersJoined);
             socket.off('new_question', handleNewQuestion);
+            socket.off('prefetch_question', handlePrefetchQuestion);
+            socket.off('reveal_question', handleRevealQuestion);
             socket.off('update_leaderboard', handleLeaderboard);
+            socket.off('leaderboard_snapshot', handleLeaderboardSnapshot);
+            socket.off('leaderboard_delta', handleLeaderboardDelta);
             socket.off('game_over', handleGameOver);
         };
     }, [socket, pin]);
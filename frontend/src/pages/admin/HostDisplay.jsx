@@ -1,38 +1,61 @@
-import React, { useState, useContext, useEffect } from 'react';
+import React, { useState, useContext, useEffect, useRef } from 'react';
 import { useParams } from 'react-router-dom';
 import { GameContext } from '../../context/GameContext';
+import { applyRosterChanges } from '../../services/roster';
+import { emptyLeaderboard, applyLeaderboardSnapshot, applyLeaderboardDelta, leaderboardList } from '../../services/leaderboard';
 
 const HostDisplay = () => {
     const { pin } = useParams();
     const { socket } = useContext(GameContext);
 
     const [players, setPlayers] = useState([]);
+    const rosterVersion = useRef(null);
+    const prefetchedQuestion = useRef(null);
+    const leaderboardState = useRef(emptyLeaderboard);
     const [currentQuestion, setCurrentQuestion] = useState(null);
     const [leaderboard, setLeaderboard] = useState([]);
     const [viewState, setViewState] = useState('LOBBY'); // LOBBY, QUESTION, LEADERBOARD, END
     const [timeLeft, setTimeLeft] = useState(20);
+    const [duration, setDuration] = useState(20);
+    const [answerCounts, setAnswerCounts] = useState({});
 
     useEffect(() => {
         if (!socket) return;
 
-        socket.connect();
-        socket.emit('join_game', { pin, nickname: 'HOST_DISPLAY' });
+        // (Re)join on every connect, sending the roster version we already have
+        // so the server only sends what changed since then
+        const joinAsHost = () => {
+            socket.emit('join_game', { pin, nickname: 'HOST_DISPLAY', roster_version: rosterVersion.current });
+            socket.emit('leaderboard_sync', { pin });
+        };
 
-        const handlePlayerJoined = (data) => {
-            if (data.nickname !== 'ADMIN' && data.nickname !== 'HOST_DISPLAY') {
-                setPlayers(prev => {
-                    if (!prev.some(p => p.nickname === data.nickname)) {
-                        return [...prev, { nickname: data.nickname }];
-                    }
-                    return prev;
-                });
+        const handleRosterSnapshot = (data) => {
+            setPlayers(prev => applyRosterChanges(data.chunk === 0 ? [] : prev, data.players));
+            if (data.chunk === data.total_chunks - 1) {
+                rosterVersion.current = data.version;
+            }
+        };
+
+        const handleRosterDelta = (data) => {
+            setPlayers(prev => applyRosterChanges(prev, data.changes));
+            rosterVersion.current = data.version;
+        };
+
+        const handlePlayersJoined = (data) => {
+            setPlayers(prev => applyRosterChanges(prev, data.players));
+            // Only advance the version if this batch continues the one we have (no gap)
+            const fromVersion = data.version - data.players.length;
+            if (rosterVersion.current !== null && fromVersion <= rosterVersion.current) {
+                rosterVersion.current = Math.max(rosterVersion.current, data.version);
             }
         };
 
         const handleNewQuestion = (q) => {
             setCurrentQuestion(q);
             setViewState('QUESTION');
-            setTimeLeft(20);
+            setDuration(q.duration || 20);
+            setTimeLeft(q.duration || 20);
+            setAnswerCounts({});
 
             // Simple timer for visual effect
             const timer = setInterval(() => {
@@ -46,24 +69,85 @@ const HostDisplay = () => {
             }, 1000);
         };
 
+        // Live histogram while the question is open, final counts when the server closes it
+        const handleAnswerCounts = (data) => {
+            setAnswerCounts(data.counts);
+        };
+
+        const handleQuestionClosed = (data) => {
+            setAnswerCounts(data.counts);
+            setTimeLeft(0);
+            // The final leaderboard of the question arrives just before this event
+            setViewState('LEADERBOARD');
+        };
+
+        const handlePrefetchQuestion = (q) => {
+            prefetchedQuestion.current = q;
+        };
+
+        const handleRevealQuestion = (data) => {
+            const q = prefetchedQuestion.current;
+            if (!q || q.index !== data.index) return;
+            setTimeout(() => handleNewQuestion({ ...q, duration: data.duration }), data.start_in * 1000);
+        };
+
         const handleLeaderboard = (data) => {
             setLeaderboard(data);
-            setViewState('LEADERBOARD');
+        };
+
+        // Compact mode: apply only the changed entries, resync on a version gap
+        const handleLeaderboardSnapshot = (data) => {
+            leaderboardState.current = applyLeaderboardSnapshot(data);
+            setLeaderboard(leaderboardList(leaderboardState.current));
+        };
+
+        const handleLeaderboardDelta = (data) => {
+            const next = applyLeaderboardDelta(leaderboardState.current, data);
+            if (!next) {
+                socket.emit('leaderboard_sync', { pin });
+                return;
+            }
+            leaderboardState.current = next;
+            setLeaderboard(leaderboardList(next));
         };
 
         const handleGameOver = () => {
             setViewState('END');
         };
 
-        socket.on('player_joined', handlePlayerJoined);
+        socket.on('connect', joinAsHost);
+        socket.on('roster_snapshot', handleRosterSnapshot);
+        socket.on('roster_delta', handleRosterDelta);
+        socket.on('players_joined', handlePlayersJoined);
         socket.on('new_question', handleNewQuestion);
+        socket.on('prefetch_question', handlePrefetchQuestion);
+        socket.on('reveal_question', handleRevealQuestion);
+        socket.on('answer_counts', handleAnswerCounts);
+        socket.on('question_closed', handleQuestionClosed);
         socket.on('update_leaderboard', handleLeaderboard);
+        socket.on('leaderboard_snapshot', handleLeaderboardSnapshot);
+        socket.on('leaderboard_delta', handleLeaderboardDelta);
         socket.on('game_over', handleGameOver);
 
+        if (socket.connected) {
+            joinAsHost();
+        } else {
+            socket.connect();
+        }
+
         return () => {
-            socket.off('player_joined', handlePlayerJoined);
+            socket.off('connect', joinAsHost);
+            socket.off('roster_snapshot', handleRosterSnapshot);
+            socket.off('roster_delta', handleRosterDelta);
+            socket.off('players_joined', handlePlayersJoined);
             socket.off('new_question', handleNewQuestion);
+            socket.off('prefetch_question', handlePrefetchQuestion);
+            socket.off('reveal_question', handleRevealQuestion);
+            socket.off('answer_counts', handleAnswerCounts);
+            socket.off('question_closed', handleQuestionClosed);
             socket.off('update_leaderboard', handleLeaderboard);
+            socket.off('leaderboard_snapshot', handleLeaderboardSnapshot);
+            socket.off('leaderboard_delta', handleLeaderboardDelta);
             socket.off('game_over', handleGameOver);
         };
     }, [socket, pin]);
@@ -122,7 +206,7 @@ const HostDisplay = () => {
                 <div className="w-full h-4 bg-slate-800 rounded-full mb-8 overflow-hidden">
                     <div
                         className="h-full bg-purple-500 transition-all duration-1000 ease-linear"
-                        style={{ width: `${(timeLeft / 20) * 100}%` }}
+                        style={{ width: `${(timeLeft / duration) * 100}%` }}
                     ></div>
                 </div>
 
@@ -142,6 +226,7 @@ const HostDisplay = () => {
                                 <div key={i} className={`${colors[i]} rounded-2xl flex items-center p-8 shadow-xl transform transition-transform hover:scale-[1.02]`}>
                                     <span className="text-6xl text-black/20 font-black mr-8">{icons[i]}</span>
                                     <span className="text-4xl md:text-5xl font-bold text-white drop-shadow-md">{opt}</span>
+                                    <span className="ml-auto text-4xl font-black text-white/80">{answerCounts[i] || 0}</span>
                                 </div>
                             );
                         })}
@@ -14,23 +14,74 @@ const QuestionManager = () => {
     });
 
     useEffect(() => {
-        // Fetch game details (mocked for now as we don't have a single game fetch endpoint yet, 
-        // but we can use the list or add one. For now, let's just fetch questions if we can, 
-        // or just rely on the ID. Ideally we fetch game info to show title.)
-        // Let's assume we can fetch game info or just proceed.
-        // Actually, we need to fetch questions for this game. 
-        // The current backend doesn't have a "get questions for game" endpoint explicitly exposed 
-        // except via socket or maybe we need to add one.
-        // For now, let's implement the add question part and maybe add a fetch questions endpoint.
-        // Wait, the original Admin.jsx used local state for added questions. 
-        // We need to persist them.
-
-        // Let's add a fetch questions endpoint to backend or just use what we have.
-        // I'll add a fetch questions function here assuming I'll add the endpoint or use an existing one.
-        // Actually, let's just implement the UI and the Add function.
-        setLoading(false);
+        fetchQuestions();
     }, [gameId]);
 
+    // Persisted questions in play order
+    const fetchQuestions = async () => {
+        try {
+            const res = await fetch(`http://localhost:5000/api/game/${gameId}/questions`);
+            if (res.ok) {
+                setQuestions(await res.json());
+            }
+        } catch (error) {
+            console.error("Error fetching questions:", error);
+        } finally {
+            setLoading(false);
+        }
+    };
+
+    // Bulk import of a JSON array or CSV file (text, correct_index, option1..option4)
+    const importQuestions = async (e) => {
+        const file = e.target.files[0];
+        e.target.value = '';
+        if (!file) return;
+
+        const isJson = file.name.toLowerCase().endsWith('.json');
+        const body = isJson ? await file.text() : new FormData();
+        if (!isJson) body.append('file', file);
+
+        try {
+            const res = await fetch(`http://localhost:5000/api/game/${gameId}/questions/import`, {
+                method: 'POST',
+                headers: isJson ? { 'Content-Type': 'application/json' } : undefined,
+                body
+            });
+            const data = await res.json();
+            if (!res.ok) {
+                alert(`${data.error}${data.details ? '\n' + data.details.join('\n') : ''}`);
+                return;
+            }
+            alert(`${data.imported} preguntas importadas`);
+            fetchQuestions();
+        } catch (error) {
+            console.error("Error importing questions:", error);
+        }
+    };
+
+    const moveQuestion = async (index, offset) => {
+        const target = index + offset;
+        if (target < 0 || target >= questions.length) return;
+
+        const reordered = [...questions];
+        [reordered[index], reordered[target]] = [reordered[target], reordered[index]];
+        setQuestions(reordered);
+
+        try {
+            const res = await fetch(`http://localhost:5000/api/game/${gameId}/questions/order`, {
+                method: 'PUT',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ order: reordered.map(q => q.id) })
+            });
+            if (!res.ok) {
+                alert((await res.json()).error);
+                fetchQuestions();
+            }
+        } catch (error) {
+            console.error("Error reordering questions:", error);
+        }
+    };
+
     const handleOptionChange = (index, value) => {
         const newOptions = [...newQuestion.options];
         newOptions[index] = value;
@@ -55,7 +106,7 @@ const QuestionManager = () => {
                 })
             });
 
-            setQuestions([...questions, { ...newQuestion, correct_index: parseInt(newQuestion.correct_index) }]);
+            fetchQuestions();
             alert("Pregunta añadida!");
             setNewQuestion({ text: '', options: ['', '', '', ''], correct_index: 0 });
         } catch (error) {
@@ -153,7 +204,13 @@ const QuestionManager = () => {
                     <div className="lg:col-span-5 space-y-6">
                         <div className="flex items-center justify-between">
                             <h3 className="text-xl font-bold text-white">Preguntas Añadidas</h3>
-                            <span className="bg-slate-800 text-slate-400 px-3 py-1 rounded-full text-sm font-mono">{questions.length}</span>
+                            <div className="flex items-center gap-3">
+                                <label className="cursor-pointer text-xs font-medium bg-slate-800 hover:bg-slate-700 text-slate-300 border border-slate-700 px-3 py-1.5 rounded-lg transition-colors">
+                                    Importar CSV/JSON
+                                    <input type="file" accept=".csv,.json" onChange={importQuestions} className="hidden" />
+                                </label>
+                                <span className="bg-slate-800 text-slate-400 px-3 py-1 rounded-full text-sm font-mono">{questions.length}</span>
+                            </div>
                         </div>
 
                         <div className="space-y-4 max-h-[calc(100vh-200px)] overflow-y-auto pr-2 custom-scrollbar">
@@ -164,10 +221,14 @@ const QuestionManager = () => {
                                 </div>
                             ) : (
                                 questions.map((q, i) => (
-                                    <div key={i} className="bg-slate-800 p-5 rounded-2xl border border-slate-700 hover:border-purple-500/30 transition-colors group relative overflow-hidden">
+                                    <div key={q.id ?? i} className="bg-slate-800 p-5 rounded-2xl border border-slate-700 hover:border-purple-500/30 transition-colors group relative overflow-hidden">
                                         <div className="absolute top-0 left-0 w-1 h-full bg-purple-500"></div>
                                         <div className="flex justify-between items-start mb-3 pl-3">
                                             <span className="text-xs font-bold text-purple-400 uppercase tracking-wider">Pregunta {i + 1}</span>
+                                            <div className="flex gap-1 opacity-60 group-hover:opacity-100 transition-opacity">
+                                                <button onClick={() => moveQuestion(i, -1)} disabled={i === 0} className="text-xs px-2 py-1 rounded bg-slate-900/50 text-slate-400 hover:text-white disabled:opacity-30">▲</button>
+                                                <button onClick={() => moveQuestion(i, 1)} disabled={i === questions.length - 1} className="text-xs px-2 py-1 rounded bg-slate-900/50 text-slate-400 hover:text-white disabled:opacity-30">▼</button>
+                                            </div>
                                         </div>
                                         <p className="font-bold text-lg text-white mb-4 pl-3 leading-snug">{q.text}</p>
 
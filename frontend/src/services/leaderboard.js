@@ -0,0 +1,33 @@
+// Compact leaderboard (games created with compact: true). The server sends
+// leaderboard_delta { v, changes: [[id, score, rank]], removed: [id], names } with only
+// the entries that changed, and leaderboard_snapshot { v, entries, names } when asked
+// with leaderboard_sync. Nicknames arrive once, when an id first shows up.
+export const emptyLeaderboard = { version: null, entries: {}, names: {} };
+
+export const applyLeaderboardSnapshot = (data) => {
+    const entries = {};
+    data.entries.forEach(([id, score, rank]) => {
+        entries[id] = { score, rank };
+    });
+    return { version: data.v, entries, names: { ...data.names } };
+};
+
+// Returns null when the delta doesn't follow the version we have (ask for a snapshot)
+export const applyLeaderboardDelta = (state, data) => {
+    if (state.version !== null && data.v <= state.version) return state;
+    if (state.version === null || data.v !== state.version + 1) return null;
+
+    const entries = { ...state.entries };
+    data.removed.forEach(id => {
+        delete entries[id];
+    });
+    data.changes.forEach(([id, score, rank]) => {
+        entries[id] = { score, rank };
+    });
+    return { version: data.v, entries, names: { ...state.names, ...data.names } };
+};
+
+// Same shape as update_leaderboard: [{ nickname, score, rank }] by rank
+export const leaderboardList = (state) => Object.entries(state.entries)
+    .map(([id, e]) => ({ nickname: state.names[id] || 'Unknown', score: e.score, rank: e.rank }))
+    .sort((a, b) => a.rank - b.rank);
@@ -0,0 +1,15 @@
+// Applies roster changes ({ op, id, nickname }) from roster_snapshot / roster_delta /
+// players_joined to a list of { id, nickname }. Entries are keyed by id so a change
+// received twice (snapshot + batch) is only applied once.
+export const applyRosterChanges = (players, changes) => {
+    const byId = new Map(players.map(p => [String(p.id), p]));
+    changes.forEach(c => {
+        const id = String(c.id);
+        if (c.op === 'leave') {
+            byId.delete(id);
+        } else {
+            byId.set(id, { id, nickname: c.nickname });
+        }
+    });
+    return Array.from(byId.values());
+};
@@ -1,9 +1,13 @@
 import { io } from 'socket.io-client';
+// null unless built with VITE_SOCKET_MSGPACK=1 (see vite.config.js)
+import msgpackParser from 'virtual:socket-parser';
 
 // Replace with your backend URL
 const SOCKET_URL = 'http://localhost:5000';
 
 export const socket = io(SOCKET_URL, {
     autoConnect: false,
-    transports: ['websocket'] // Force WebSocket to avoid polling initially if desired
+    transports: ['websocket'], // Force WebSocket to avoid polling initially if desired
+    // Binary packets, must match the server's SOCKETIO_SERIALIZER=msgpack
+    ...(msgpackParser ? { parser: msgpackParser } : {})
 });
@@ -1,7 +1,19 @@
-import { defineConfig } from 'vite'
+import { defineConfig, loadEnv } from 'vite'
 import react from '@vitejs/plugin-react'
 
-// https://vitejs.dev/config/
-export default defineConfig({
-    plugins: [react()],
+// Socket.IO parser, chosen at build time through the virtual:socket-parser module:
+// with VITE_SOCKET_MSGPACK=1 it is socket.io-msgpack-parser (npm install it first),
+// otherwise null (default JSON parser) and the package is never imported.
+const socketParser = (msgpack) => ({
+    name: 'socket-parser',
+    resolveId: (id) => (id === 'virtual:socket-parser' ? '\0virtual:socket-parser' : null),
+    load: (id) => {
+        if (id !== '\0virtual:socket-parser') return null;
+        return msgpack ? "export { default } from 'socket.io-msgpack-parser';" : 'export default null;';
+    },
 })
+
+// https://vitejs.dev/config/
+export default defineConfig(({ mode }) => ({
+    plugins: [react(), socketParser(loadEnv(mode, process.cwd()).VITE_SOCKET_MSGPACK === '1')],
+}))